@@ -0,0 +1,260 @@
+"""Rolling-origin backtest of the season forecasting models across the league.
+
+For every metric and origin season, the models are trained on the lag windows
+of all players whose target season comes before the origin and score the
+windows of the origin season, so each origin is a one-season-ahead forecast
+that never sees its future. Every (metric, origin, model) fit runs in a
+process pool, and the results are stored in a parquet table that the LSTM vs
+Random Forest page reads instead of retraining on demand.
+
+    python -m analytics.backtest --metrics PTS AST --origins 4 --workers 4
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from analytics.data import TOTALS
+from analytics.metrics import metrics_for
+from analytics.model_registry import MODEL_DIR
+from analytics.inference import NumpyForest, NumpyLSTM
+from analytics.panel import load_panel
+from analytics.panel_models import Standardizer, make_lstm, train_lstm
+
+logger = logging.getLogger(__name__)
+
+BACKTEST_PATH = os.path.join(MODEL_DIR, "backtest.parquet")
+METRICS = ["PTS", "TRB", "AST", "FG_Pct", "eFG_Pct"] + metrics_for(TOTALS)
+MODELS = {"naive": "Последний сезон", "rf": "Random Forest", "lstm": "LSTM"}
+DEFAULT_PARAMS = {
+    "rf_trees": 100,
+    "lstm_units": 50,
+    "lstm_epochs": 50,
+    "batch_size": 256,
+    "patience": 5,
+    "optimizer": "adam",
+}
+KEY_COLUMNS = ["metric", "lags", "origin", "model"]
+LATENCY_REPEATS = 20
+
+
+def folds(panel, metric, lags, n_origins):
+    """(origin, X_train, y_train, X_test, y_test) for the last n_origins seasons.
+
+    Origins are the last seasons with target windows; each trains on windows
+    whose target season is earlier and tests on windows of the origin.
+    """
+    X, y, _, seasons, _ = panel.windows(metric, lags)
+    origins = np.unique(seasons)[-n_origins:]
+    for origin in origins:
+        train, test = seasons < origin, seasons == origin
+        if train.any() and test.any():
+            yield int(origin), X[train], y[train], X[test], y[test]
+
+
+def fit_predictor(model, X_train, y_train, params):
+    """Fits one model on standardized windows and returns predict(X).
+
+    Predictions go through the exported NumPy models, as on the dashboard.
+    """
+    if model == "naive":
+        return lambda X: X[:, -1]
+    scaler = Standardizer(y_train)
+    Xs, ys = scaler.transform(X_train), scaler.transform(y_train)
+    if model == "rf":
+        rf = RandomForestRegressor(
+            n_estimators=int(params["rf_trees"]), random_state=42, n_jobs=1
+        ).fit(Xs, ys)
+        forest = NumpyForest.from_sklearn(rf)
+        return lambda X: scaler.inverse(forest.predict(scaler.transform(X)))
+    if model == "lstm":
+        lstm = train_lstm(
+            make_lstm(X_train.shape[1], params["lstm_units"], params["optimizer"]),
+            Xs[..., None],
+            ys,
+            params["lstm_epochs"],
+            params["batch_size"],
+            params["patience"],
+        )
+        network = NumpyLSTM.from_keras(lstm)
+        return lambda X: scaler.inverse(network.predict(scaler.transform(X)))
+    raise ValueError(f"Unknown model: {model}")
+
+
+def evaluate_fold(model, X_train, y_train, X_test, y_test, params):
+    """Errors, fit time and inference latency of one model on one origin."""
+    start = time.perf_counter()
+    predict = fit_predictor(model, X_train, y_train, params)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pred = predict(X_test)
+    predict_s = time.perf_counter() - start
+    # Latency of a single-window call, as when the page forecasts one player.
+    latencies = []
+    for i in range(min(LATENCY_REPEATS, len(X_test))):
+        start = time.perf_counter()
+        predict(X_test[i : i + 1])
+        latencies.append(time.perf_counter() - start)
+
+    error = y_test - pred
+    return {
+        "n_train": len(y_train),
+        "n_test": len(y_test),
+        "mse": float(np.mean(error**2)),
+        "mae": float(np.mean(np.abs(error))),
+        "fit_s": fit_s,
+        "predict_us_per_window": predict_s / len(y_test) * 1e6,
+        "latency_ms": float(np.median(latencies)) * 1e3,
+    }
+
+
+def run_backtest(
+    metrics,
+    lags=3,
+    n_origins=3,
+    models=("naive", "rf", "lstm"),
+    params=None,
+    max_workers=None,
+    progress=None,
+):
+    """Evaluates every (metric, origin, model) in a process pool.
+
+    Returns one row per fit with KEY_COLUMNS, the errors and timings, the
+    hyperparameters and the data fingerprint.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    progress = progress or (lambda fraction, message: None)
+    panel = load_panel(TOTALS)
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        futures = {}
+        for metric in metrics:
+            for origin, *split in folds(panel, metric, lags, n_origins):
+                for model in models:
+                    future = pool.submit(evaluate_fold, model, *split, params)
+                    futures[future] = (metric, lags, origin, model)
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                key = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    logger.exception("Backtest failed for %s", key)
+                    continue
+                rows.append(dict(zip(KEY_COLUMNS, key), **result))
+                progress(
+                    done / len(futures), f"Готово обучений: {done} из {len(futures)}"
+                )
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    results = pd.DataFrame(rows).sort_values(KEY_COLUMNS, ignore_index=True)
+    for name, value in params.items():
+        results[name] = value
+    results["data_version"] = panel.fingerprint
+    return results
+
+
+def load_results(path=BACKTEST_PATH):
+    """Stored backtest rows, or None before the first run."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def save_results(results, path=BACKTEST_PATH):
+    """Replaces stored rows with the same keys and rewrites the table."""
+    stored = load_results(path)
+    if stored is not None:
+        keys = pd.MultiIndex.from_frame(results[KEY_COLUMNS].drop_duplicates())
+        stored = stored[~pd.MultiIndex.from_frame(stored[KEY_COLUMNS]).isin(keys)]
+        results = pd.concat([stored, results], ignore_index=True)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    results.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return results
+
+
+def summary(results):
+    """League-wide comparison per (metric, lags, model) over all origins.
+
+    MSE and MAE are pooled over every test window; mse_vs_naive is the
+    model's MSE relative to repeating the last season (below 1 is better).
+    """
+    weighted = results.assign(
+        se=results["mse"] * results["n_test"],
+        ae=results["mae"] * results["n_test"],
+    )
+    table = weighted.groupby(["metric", "lags", "model"]).agg(
+        origins=("origin", "nunique"),
+        windows=("n_test", "sum"),
+        se=("se", "sum"),
+        ae=("ae", "sum"),
+        fit_s=("fit_s", "sum"),
+        predict_us_per_window=("predict_us_per_window", "mean"),
+        latency_ms=("latency_ms", "median"),
+    )
+    table["mse"] = table.pop("se") / table["windows"]
+    table["mae"] = table.pop("ae") / table["windows"]
+    naive = table["mse"].where(table.index.get_level_values("model") == "naive")
+    naive = naive.groupby(level=["metric", "lags"]).transform("max")
+    table["mse_vs_naive"] = table["mse"] / naive
+    return table.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin model backtest")
+    parser.add_argument("--metrics", nargs="+", default=METRICS)
+    parser.add_argument("--lags", type=int, nargs="+", default=[3])
+    parser.add_argument("--origins", type=int, default=3, help="Seasons to test.")
+    parser.add_argument(
+        "--models", nargs="+", choices=list(MODELS), default=list(MODELS)
+    )
+    parser.add_argument("--rf-trees", type=int, default=DEFAULT_PARAMS["rf_trees"])
+    parser.add_argument("--lstm-units", type=int, default=DEFAULT_PARAMS["lstm_units"])
+    parser.add_argument(
+        "--lstm-epochs", type=int, default=DEFAULT_PARAMS["lstm_epochs"]
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_PARAMS["batch_size"])
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    models = list(args.models)
+    if "lstm" in models and importlib.util.find_spec("tensorflow") is None:
+        logger.warning("TensorFlow is not installed; skipping the LSTM")
+        models.remove("lstm")
+    params = {
+        "rf_trees": args.rf_trees,
+        "lstm_units": args.lstm_units,
+        "lstm_epochs": args.lstm_epochs,
+        "batch_size": args.batch_size,
+    }
+    start = time.perf_counter()
+    for lags in args.lags:
+        results = run_backtest(
+            args.metrics,
+            lags,
+            args.origins,
+            models,
+            params,
+            args.workers,
+            lambda fraction, message: logger.info(message),
+        )
+        save_results(results)
+    logger.info("Backtest finished in %.1f s", time.perf_counter() - start)
+    print(summary(load_results()).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+K_RANGE = range(2, 11)
+# Silhouette is quadratic in the number of rows; score a fixed sample instead.
+SILHOUETTE_SAMPLE = 3000
+# Rows per partial_fit step of the incremental models.
+CHUNK_SIZE = 2048
+
+
+@dataclass(frozen=True)
+class Clustering:
+    k: int
+    labels: np.ndarray
+    centers: pd.DataFrame
+    inertia: float
+    silhouette: float
+
+
+@dataclass(frozen=True)
+class Projection:
+    coords: pd.DataFrame
+    loadings: pd.DataFrame
+
+
+def standardize(df):
+    scaler = StandardScaler().fit(df)
+    return scaler, scaler.transform(df)
+
+
+def fit_kmeans(df, k, random_state=42):
+    """KMeans on standardized columns; centers are in the original units."""
+    scaler, X = standardize(df)
+    return _fit(X, scaler, list(df.columns), k, random_state)
+
+
+def k_sweep(df, ks=K_RANGE, max_workers=None, random_state=42):
+    """Fits every K in parallel; returns {k: Clustering} and an inertia/silhouette table."""
+    scaler, X = standardize(df)
+    ks = [k for k in ks if k < len(df)]
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        fits = pool.map(
+            lambda k: _fit(X, scaler, list(df.columns), k, random_state), ks
+        )
+        results = {fit.k: fit for fit in fits}
+    curves = pd.DataFrame(
+        {
+            "K": ks,
+            "Inertia": [results[k].inertia for k in ks],
+            "Silhouette": [results[k].silhouette for k in ks],
+        }
+    )
+    return results, curves
+
+
+def pca_projection(df, n_components=2):
+    _, X = standardize(df)
+    pca = PCA(n_components=n_components)
+    names = [f"PC{i + 1}" for i in range(n_components)]
+    coords = pd.DataFrame(pca.fit_transform(X), columns=names, index=df.index)
+    loadings = pd.DataFrame(pca.components_, columns=df.columns, index=names)
+    return Projection(coords, loadings)
+
+
+def _fit(X, scaler, columns, k, random_state):
+    kmeans = KMeans(n_clusters=k, random_state=random_state).fit(X)
+    centers = pd.DataFrame(
+        scaler.inverse_transform(kmeans.cluster_centers_), columns=columns
+    )
+    silhouette = silhouette_score(
+        X,
+        kmeans.labels_,
+        sample_size=min(SILHOUETTE_SAMPLE, len(X)),
+        random_state=random_state,
+    )
+    return Clustering(
+        k, kmeans.labels_, centers, float(kmeans.inertia_), float(silhouette)
+    )
+
+
+class IncrementalClusterer:
+    """Mini-batch KMeans and incremental PCA over a growing row-level table.
+
+    update() checks the keys of the passed rows against a set of the keys
+    already seen and feeds only the new rows, in fixed-size chunks, to the
+    models. New rows are appended as a part of their own, so the history is
+    never rescanned or copied: an update costs O(rows passed in), and the
+    model fits O(new rows). The scaler is fitted on the first batch and kept
+    fixed, so cluster centers stay comparable as data arrives; a first batch
+    with fewer than k rows is left pending until enough rows are passed in.
+    """
+
+    def __init__(
+        self,
+        stats,
+        key_cols,
+        k,
+        chunk_size=CHUNK_SIZE,
+        initial_epochs=3,
+        random_state=42,
+    ):
+        self.stats = list(stats)
+        self.key_cols = list(key_cols)
+        self.k = k
+        self.chunk_size = chunk_size
+        self.initial_epochs = initial_epochs
+        self.scaler = None
+        self.kmeans = MiniBatchKMeans(
+            n_clusters=k, batch_size=chunk_size, random_state=random_state
+        )
+        self.pca = IncrementalPCA(n_components=min(2, len(self.stats)))
+        self.version = 0
+        self._seen = set()
+        self._parts = []
+        self._rows = None
+        self._lock = threading.Lock()
+
+    @property
+    def rows(self):
+        """All rows fed so far, in arrival order."""
+        with self._lock:
+            if self._rows is None:
+                if self._parts:
+                    self._rows = pd.concat(self._parts, ignore_index=True)
+                else:
+                    self._rows = pd.DataFrame(columns=self.key_cols + self.stats)
+                self._parts = [self._rows]
+            return self._rows
+
+    def update(self, df):
+        """Feeds unseen rows of df to the models; returns how many were added."""
+        with self._lock:
+            new, keys = self._unseen(df[self.key_cols + self.stats].dropna())
+            if new.empty or (self.scaler is None and len(new) < self.k):
+                return 0
+            epochs = 1
+            if self.scaler is None:
+                self.scaler = StandardScaler().fit(new[self.stats])
+                # A single mini-batch pass gives rough initial centers.
+                epochs = self.initial_epochs
+            X = self.scaler.transform(new[self.stats])
+            # Short tails are merged into the previous chunk, since both models
+            # need a minimum number of rows per step.
+            n_chunks = max(1, len(X) // self.chunk_size)
+            for epoch in range(epochs):
+                for chunk in np.array_split(X, n_chunks):
+                    if len(chunk) >= self.k:
+                        self.kmeans.partial_fit(chunk)
+                    if epoch == 0 and len(chunk) >= self.pca.n_components:
+                        self.pca.partial_fit(chunk)
+            self._parts.append(new.reset_index(drop=True))
+            self._seen.update(keys)
+            self._rows = None
+            self.version += 1
+            return len(new)
+
+    @property
+    def centers(self):
+        return pd.DataFrame(
+            self.scaler.inverse_transform(self.kmeans.cluster_centers_),
+            columns=self.stats,
+        )
+
+    def labels(self):
+        return self._chunked(self.kmeans.predict)
+
+    def projection(self, rows=None):
+        """PCA coordinates of rows (all rows fed so far by default)."""
+        rows = self.rows if rows is None else rows
+        names = [f"PC{i + 1}" for i in range(self.pca.n_components)]
+        coords = pd.DataFrame(
+            self._chunked(self.pca.transform, rows), columns=names, index=rows.index
+        )
+        loadings = pd.DataFrame(self.pca.components_, columns=self.stats, index=names)
+        return Projection(coords, loadings)
+
+    def _unseen(self, df):
+        """Rows of df with keys not seen before, and the set of those keys."""
+        keys = list(df[self.key_cols].itertuples(index=False, name=None))
+        mask = np.zeros(len(keys), dtype=bool)
+        new_keys = set()
+        for i, key in enumerate(keys):
+            if key not in self._seen and key not in new_keys:
+                new_keys.add(key)
+                mask[i] = True
+        return df[mask], new_keys
+
+    def _chunked(self, transform, rows=None):
+        values = (self.rows if rows is None else rows)[self.stats]
+        parts = [
+            transform(self.scaler.transform(values.iloc[i : i + self.chunk_size]))
+            for i in range(0, len(values), self.chunk_size)
+        ]
+        return np.concatenate(parts)
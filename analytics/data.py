@@ -0,0 +1,60 @@
+import functools
+import hashlib
+import os
+
+import pandas as pd
+
+DATA_DIR = "data"
+
+PLAYER_TOTALS = "nba_player_totals_2000-2024.csv"
+TEAM_STANDINGS = "nba_team_standings_2000-2024.csv"
+PER_GAME = "parsed_player_per_game_stats.csv"
+TOTALS = "parsed_player_totals_stats.csv"
+TEAM_MISC = "parsed_team_misc_stats.csv"
+TEAM_OPP = "parsed_team_opponent_stats.csv"
+SALARIES = "parsed_team_salaries.csv"
+SCHEDULE = "games_schedule.csv"
+FOUR_FACTORS = "game_four_factors.csv"
+
+DASHBOARD_TABLES = [
+    PLAYER_TOTALS,
+    TEAM_STANDINGS,
+    PER_GAME,
+    TOTALS,
+    TEAM_MISC,
+    TEAM_OPP,
+    SALARIES,
+    SCHEDULE,
+    FOUR_FACTORS,
+]
+
+
+def read_table(name):
+    return pd.read_csv(os.path.join(DATA_DIR, name))
+
+
+@functools.lru_cache(maxsize=None)
+def load_table(name):
+    """Reads a CSV from the data directory once per process, with derived metrics.
+
+    The frame is shared between callers, so it must not be modified in place.
+    """
+    from analytics.metrics import apply_derived_metrics
+
+    return apply_derived_metrics(name, read_table(name), load_table)
+
+
+def reload():
+    """Drops the loaded tables so the next load picks up freshly ingested CSVs."""
+    from analytics.panel import load_panel
+
+    load_table.cache_clear()
+    load_panel.cache_clear()
+
+
+def frame_fingerprint(df):
+    """Content hash of a frame, used to key caches and stored models."""
+    hashed = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    digest = hashlib.sha1(hashed.tobytes())
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()[:16]
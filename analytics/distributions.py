@@ -0,0 +1,49 @@
+import altair as alt
+import numpy as np
+import pandas as pd
+
+QUANTILES = {"min": 0.0, "q1": 0.25, "median": 0.5, "q3": 0.75, "max": 1.0}
+
+
+def histogram(values, bins=20):
+    """Bin counts for a numeric series, one row per bin."""
+    values = pd.to_numeric(pd.Series(values), errors="coerce").dropna().to_numpy()
+    if values.size == 0:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "count"])
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame(
+        {"bin_start": edges[:-1], "bin_end": edges[1:], "count": counts}
+    )
+
+
+def five_number_summary(frame, group_col, metric):
+    """Min, quartiles and max of metric for every value of group_col."""
+    summary = (
+        frame.groupby(group_col)[metric]
+        .quantile(list(QUANTILES.values()))
+        .unstack()
+        .rename(columns={q: name for name, q in QUANTILES.items()})
+    )
+    return summary.reset_index()
+
+
+def histogram_chart(bins, metric):
+    return (
+        alt.Chart(bins)
+        .mark_bar()
+        .encode(
+            x=alt.X("bin_start:Q", bin="binned", title=metric),
+            x2="bin_end:Q",
+            y=alt.Y("count:Q", title="Количество"),
+        )
+        .properties(width=700, height=300)
+    )
+
+
+def boxplot_chart(summary, group_col, metric):
+    """Box-and-whisker chart drawn from a precomputed five-number summary."""
+    base = alt.Chart(summary).encode(x=f"{group_col}:O")
+    whiskers = base.mark_rule().encode(y=alt.Y("min:Q", title=metric), y2="max:Q")
+    boxes = base.mark_bar(size=14).encode(y="q1:Q", y2="q3:Q")
+    medians = base.mark_tick(color="white", size=14).encode(y="median:Q")
+    return (whiskers + boxes + medians).properties(width=700, height=300)
@@ -0,0 +1,212 @@
+import os
+from collections import deque
+from dataclasses import dataclass, field
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from analytics.model_registry import MODEL_DIR
+
+FACTORS = ["Pace", "eFG_Pct", "TOV_Pct", "ORB_Pct", "FT_per_FGA", "ORtg", "Win"]
+LAST_N = 10
+MAX_REST_DAYS = 7
+STORE_PATH = os.path.join(MODEL_DIR, "pregame_features.joblib")
+
+
+def feature_names(last_n=LAST_N):
+    names = [f"{f}_last{last_n}" for f in FACTORS]
+    names += [f"{f}_season" for f in FACTORS]
+    return names + ["Rest_Days", "B2B", "Games_Played"]
+
+
+def team_games(schedule, ff):
+    """Long frame with one row per team per game, in chronological order."""
+    games = schedule[
+        [
+            "Game_ID",
+            "Date",
+            "Season_End_Year",
+            "Home_Team_ID",
+            "Visitor_Team_ID",
+            "Home_Win",
+        ]
+    ]
+    home = games.assign(Team=games["Home_Team_ID"], Is_Home=1, Win=games["Home_Win"])
+    away = games.assign(
+        Team=games["Visitor_Team_ID"], Is_Home=0, Win=1 - games["Home_Win"]
+    )
+    long = pd.concat([home, away], ignore_index=True)
+    long = long.merge(
+        ff.rename(columns={"Team_ID": "Team"}), on=["Game_ID", "Team"], how="left"
+    )
+    long["Date"] = pd.to_datetime(long["Date"])
+    long = long.sort_values(["Date", "Game_ID", "Is_Home"], kind="stable")
+    cols = ["Game_ID", "Date", "Season_End_Year", "Team", "Is_Home"] + FACTORS
+    return long[cols].reset_index(drop=True)
+
+
+@dataclass
+class TeamState:
+    """Running totals of a team in its current season."""
+
+    season: int
+    last_date: pd.Timestamp
+    games: int
+    sums: np.ndarray
+    recent: deque = field(default_factory=deque)
+
+
+class PregameFeatureStore:
+    """Leakage-free pre-game team features, computed as of each game date.
+
+    The full build is a single vectorized pass over grouped cumulative sums;
+    update() appends new games using per-team running state, so its cost is
+    proportional to the number of new games.
+    """
+
+    def __init__(self, last_n=LAST_N):
+        self.last_n = last_n
+        self.features = pd.DataFrame()
+        self._state = {}
+
+    @property
+    def feature_names(self):
+        return feature_names(self.last_n)
+
+    @property
+    def game_ids(self):
+        return set(self.features["Game_ID"]) if not self.features.empty else set()
+
+    def build(self, schedule, ff):
+        long = team_games(schedule, ff)
+        n = self.last_n
+        keys = [long["Team"], long["Season_End_Year"]]
+        values = long[FACTORS]
+        grouped = values.groupby(keys)
+
+        played = grouped.cumcount()
+        prior_sum = grouped.cumsum() - values
+        lagged_sum = prior_sum.groupby(keys).shift(n).fillna(0)
+        recent_count = np.minimum(played, n).replace(0, np.nan)
+
+        season = prior_sum.div(played.replace(0, np.nan), axis=0)
+        recent = (prior_sum - lagged_sum).div(recent_count, axis=0)
+        rest = long.groupby(keys)["Date"].diff().dt.days
+
+        features = long[["Game_ID", "Date", "Season_End_Year", "Team", "Is_Home"]]
+        features = pd.concat(
+            [
+                features,
+                recent.add_suffix(f"_last{n}"),
+                season.add_suffix("_season"),
+            ],
+            axis=1,
+        )
+        features["Rest_Days"] = rest.fillna(MAX_REST_DAYS).clip(upper=MAX_REST_DAYS)
+        features["B2B"] = (features["Rest_Days"] == 1).astype(int)
+        features["Games_Played"] = played
+        self.features = features
+        self._state = self._state_from(long)
+        return self
+
+    def update(self, schedule, ff):
+        """Adds games that are not in the store yet; returns how many were added."""
+        known = self.game_ids
+        new_games = schedule[~schedule["Game_ID"].isin(known)]
+        if new_games.empty:
+            return 0
+        long = team_games(new_games, ff[ff["Game_ID"].isin(new_games["Game_ID"])])
+        if not self.features.empty and long["Date"].min() < self.features["Date"].max():
+            # Back-filled history invalidates the running state.
+            self.build(schedule, ff)
+            return len(new_games)
+
+        rows = []
+        for row in long.itertuples(index=False):
+            values = np.array([getattr(row, f) for f in FACTORS], dtype=float)
+            state = self._state.get(row.Team)
+            if state is None or state.season != row.Season_End_Year:
+                state = TeamState(
+                    row.Season_End_Year, None, 0, np.zeros(len(FACTORS)), deque()
+                )
+                self._state[row.Team] = state
+            rows.append(self._features_from_state(row, state))
+            state.games += 1
+            state.sums = state.sums + values
+            state.recent.append(values)
+            if len(state.recent) > self.last_n:
+                state.recent.popleft()
+            state.last_date = row.Date
+        added = pd.DataFrame(rows, columns=self.features.columns)
+        self.features = pd.concat([self.features, added], ignore_index=True)
+        return len(new_games)
+
+    def match_frame(self, schedule):
+        """One row per game with home_/away_ features and their differences."""
+        names = self.feature_names
+        home = self.features[self.features["Is_Home"] == 1][["Game_ID"] + names]
+        away = self.features[self.features["Is_Home"] == 0][["Game_ID"] + names]
+        df = schedule.merge(
+            home.rename(columns={c: f"home_{c}" for c in names}), on="Game_ID"
+        ).merge(away.rename(columns={c: f"away_{c}" for c in names}), on="Game_ID")
+        for name in names:
+            # A team's first game of a season has no history; treat it as even.
+            df[f"{name}_diff"] = (df[f"home_{name}"] - df[f"away_{name}"]).fillna(0)
+        return df
+
+    def save(self, path=STORE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path=STORE_PATH):
+        return joblib.load(path)
+
+    def _features_from_state(self, row, state):
+        nan = np.full(len(FACTORS), np.nan)
+        recent = np.mean(state.recent, axis=0) if state.recent else nan
+        season = state.sums / state.games if state.games else nan
+        if state.last_date is None:
+            rest = MAX_REST_DAYS
+        else:
+            rest = min((row.Date - state.last_date).days, MAX_REST_DAYS)
+        return [
+            row.Game_ID,
+            row.Date,
+            row.Season_End_Year,
+            row.Team,
+            row.Is_Home,
+            *recent,
+            *season,
+            rest,
+            int(rest == 1),
+            state.games,
+        ]
+
+    def _state_from(self, long):
+        state = {}
+        for team, games in long.groupby("Team"):
+            games = games[games["Season_End_Year"] == games["Season_End_Year"].max()]
+            values = games[FACTORS].to_numpy(dtype=float)
+            state[team] = TeamState(
+                season=games["Season_End_Year"].iloc[-1],
+                last_date=games["Date"].iloc[-1],
+                games=len(games),
+                sums=values.sum(axis=0),
+                recent=deque(values[-self.last_n :]),
+            )
+        return state
+
+
+def load_or_build(schedule, ff, path=STORE_PATH):
+    """Loads the persisted store, appends any new games and saves it back."""
+    if os.path.exists(path):
+        store = PregameFeatureStore.load(path)
+        if store.update(schedule, ff) == 0:
+            return store
+    else:
+        store = PregameFeatureStore().build(schedule, ff)
+    store.save(path)
+    return store
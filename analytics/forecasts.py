@@ -0,0 +1,312 @@
+"""Batch season forecasts stored in a columnar forecast table.
+
+Every (entity, metric) series is forecast and its 90% interval is stored in
+a parquet table keyed by entity type, entity, metric, engine, history window
+and horizon, together with a hash of the history. Re-running the job after
+an ingest only re-forecasts series whose hash changed. Prophet series are
+fitted in a process pool; the NumPy smoothing engine forecasts all series of
+a metric in one matrix pass.
+
+    python -m analytics.forecasts --entity team --workers 4
+    python -m analytics.forecasts --engine ets
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from analytics.data import PER_GAME, TEAM_MISC
+from analytics.metrics import metrics_for
+from analytics.model_registry import MODEL_DIR
+from analytics.panel import load_panel
+from analytics.smoothing import ets_forecast, forecast_frame
+
+logger = logging.getLogger(__name__)
+
+FORECAST_PATH = os.path.join(MODEL_DIR, "forecasts.parquet")
+MAX_HORIZON = 10
+MIN_SEASONS = 3
+INTERVAL_WIDTH = 0.9
+
+# entity type -> (panel table, metrics offered for forecasting)
+ENTITIES = {
+    "player": (
+        PER_GAME,
+        ["PTS", "TRB", "AST", "FG_Pct", "3P_Pct"] + metrics_for(PER_GAME),
+    ),
+    "team": (
+        TEAM_MISC,
+        ["SRS", "ORtg", "Pace", "eFG_Pct", "TOV_Pct"] + metrics_for(TEAM_MISC),
+    ),
+}
+
+ENGINES = {"ets": "Экспоненциальное сглаживание (NumPy)", "prophet": "Prophet"}
+
+KEY_COLUMNS = [
+    "entity_type",
+    "entity",
+    "metric",
+    "engine",
+    "start",
+    "end",
+    "horizon",
+]
+COLUMNS = KEY_COLUMNS + [
+    "series_hash",
+    "Season",
+    "yhat",
+    "yhat_lower",
+    "yhat_upper",
+]
+
+
+def series_hash(series):
+    data = np.column_stack([series.index.to_numpy(float), series.to_numpy(float)])
+    return hashlib.sha1(data.tobytes()).hexdigest()[:16]
+
+
+def prophet_forecast(series, horizon=MAX_HORIZON, interval_width=INTERVAL_WIDTH):
+    """Season, yhat, yhat_lower, yhat_upper for the horizon seasons after series."""
+    from prophet import Prophet
+
+    history = pd.DataFrame(
+        {
+            "ds": pd.to_datetime(series.index.astype(str) + "-01-01"),
+            "y": series.to_numpy(),
+        }
+    )
+    model = Prophet(interval_width=interval_width)
+    model.fit(history)
+    future = model.make_future_dataframe(periods=horizon, freq="YS")
+    forecast = model.predict(future)
+    forecast = forecast[forecast["ds"] > history["ds"].max()]
+    return pd.DataFrame(
+        {
+            "Season": forecast["ds"].dt.year.to_numpy(),
+            "yhat": forecast["yhat"].to_numpy(),
+            "yhat_lower": forecast["yhat_lower"].to_numpy(),
+            "yhat_upper": forecast["yhat_upper"].to_numpy(),
+        }
+    )
+
+
+class ForecastTable:
+    """Parquet-backed forecast table with lookups by key."""
+
+    def __init__(self, path=FORECAST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        self._mtime = self._modified()
+        if self._mtime is not None:
+            self.frame = pd.read_parquet(self.path)
+            if "engine" not in self.frame:
+                # Tables written before the engine column only held Prophet.
+                self.frame.insert(3, "engine", "prophet")
+        else:
+            self.frame = pd.DataFrame(columns=COLUMNS)
+        self._index = None
+
+    def refresh(self):
+        """Reloads the table if another process (the batch job) rewrote it."""
+        if self._modified() != self._mtime:
+            with self._lock:
+                self.reload()
+
+    def _modified(self):
+        return os.path.getmtime(self.path) if os.path.exists(self.path) else None
+
+    def hashes(self):
+        """Key tuple -> series hash of every stored forecast."""
+        first = self.frame.drop_duplicates(KEY_COLUMNS)
+        keys = first[KEY_COLUMNS].itertuples(index=False, name=None)
+        return dict(zip(keys, first["series_hash"]))
+
+    def lookup(self, entity_type, entity, metric, engine, start, end, horizon):
+        """Stored forecast for the window cut to horizon; None when missing.
+
+        A forecast stored with a longer horizon answers shorter ones too.
+        """
+        window = (entity_type, entity, metric, engine, start, end)
+        stored = self._grouped().get(window, {})
+        longer = [h for h in stored if h >= horizon]
+        if not longer:
+            return None
+        rows = stored[min(longer)][:horizon]
+        return self.frame.iloc[rows][
+            ["Season", "yhat", "yhat_lower", "yhat_upper", "series_hash"]
+        ].reset_index(drop=True)
+
+    def upsert(self, forecasts):
+        """Replaces the stored rows of every key present in forecasts and saves."""
+        if forecasts.empty:
+            return
+        with self._lock:
+            keys = pd.MultiIndex.from_frame(forecasts[KEY_COLUMNS].drop_duplicates())
+            stale = pd.MultiIndex.from_frame(self.frame[KEY_COLUMNS]).isin(keys)
+            kept = self.frame[~stale]
+            frames = [kept, forecasts] if not kept.empty else [forecasts]
+            self.frame = pd.concat(frames, ignore_index=True)[COLUMNS]
+            self._index = None
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.frame.to_parquet(self.path + ".tmp", index=False)
+            os.replace(self.path + ".tmp", self.path)
+            self._mtime = self._modified()
+
+    def _grouped(self):
+        # (entity_type, entity, metric, engine, start, end) -> {horizon: rows}
+        if self._index is None:
+            index = {}
+            groups = self.frame.groupby(KEY_COLUMNS, sort=False).indices
+            for (*window, horizon), rows in groups.items():
+                window[4:6] = int(window[4]), int(window[5])
+                index.setdefault(tuple(window), {})[int(horizon)] = np.sort(rows)
+            self._index = index
+        return self._index
+
+
+FORECASTERS = {"ets": ets_forecast, "prophet": prophet_forecast}
+
+
+def forecast_rows(key, series, forecaster=None):
+    """Forecast of one series as forecast table rows."""
+    forecaster = forecaster or FORECASTERS[key[3]]
+    forecast = forecaster(series, horizon=key[-1])
+    for name, value in zip(KEY_COLUMNS, key):
+        forecast[name] = value
+    forecast["series_hash"] = series_hash(series)
+    return forecast[COLUMNS]
+
+
+def stale_series(
+    entity_type,
+    start,
+    end,
+    horizon=MAX_HORIZON,
+    metrics=None,
+    table=None,
+    engine="prophet",
+):
+    """(key, series) of every series whose forecast is missing or out of date."""
+    table_name, default_metrics = ENTITIES[entity_type]
+    panel = load_panel(table_name)
+    stored = table.hashes() if table is not None else {}
+    for metric in metrics or default_metrics:
+        values = panel.long(metric, start, end)
+        for entity, series in values.groupby(level=0):
+            series = series.droplevel(0)
+            if len(series) < MIN_SEASONS:
+                continue
+            key = (entity_type, entity, metric, engine, start, end, horizon)
+            if stored.get(key) != series_hash(series):
+                yield key, series
+
+
+def ets_rows(jobs):
+    """Forecast table rows of smoothing jobs, one matrix pass per window."""
+    groups = {}
+    for key, series in jobs:
+        groups.setdefault(key[:1] + key[2:], {})[key[1]] = series
+    frames = []
+    for (entity_type, metric, engine, start, end, horizon), series in groups.items():
+        forecast = forecast_frame(pd.concat(series), horizon)
+        hashes = {entity: series_hash(s) for entity, s in series.items()}
+        forecast["series_hash"] = forecast["entity"].map(hashes)
+        forecast = forecast.assign(
+            entity_type=entity_type,
+            metric=metric,
+            engine=engine,
+            start=start,
+            end=end,
+            horizon=horizon,
+        )
+        frames.append(forecast[COLUMNS])
+    return pd.concat(frames, ignore_index=True)
+
+
+def run_batch(table, jobs, max_workers=None, progress=None, forecaster=None):
+    """Forecasts jobs and upserts the results; returns the number stored.
+
+    Smoothing jobs are vectorized in-process; the rest run in a process pool.
+    """
+    progress = progress or (lambda fraction, message: None)
+    jobs = list(jobs)
+    vectorized, pooled = [], []
+    for job in jobs:
+        is_ets = forecaster is None and job[0][3] == "ets"
+        (vectorized if is_ets else pooled).append(job)
+    results = [ets_rows(vectorized)] if vectorized else []
+    failed = 0
+    if pooled:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            futures = {
+                pool.submit(forecast_rows, key, series, forecaster): key
+                for key, series in pooled
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    results.append(future.result())
+                except Exception:
+                    failed += 1
+                    logger.exception("Forecast failed for %s", futures[future])
+                if done % 100 == 0 or done == len(futures):
+                    progress(
+                        done / len(futures), f"Готово рядов: {done} из {len(futures)}"
+                    )
+    if results:
+        table.upsert(pd.concat(results, ignore_index=True))
+    if failed:
+        logger.warning("%d of %d forecasts failed", failed, len(jobs))
+    return len(jobs) - failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch season forecasts")
+    parser.add_argument("--entity", choices=list(ENTITIES), nargs="+")
+    parser.add_argument("--metrics", nargs="+", help="Defaults to all metrics.")
+    parser.add_argument("--start", type=int, help="First season of the history.")
+    parser.add_argument("--end", type=int, help="Last season of the history.")
+    parser.add_argument("--horizon", type=int, default=MAX_HORIZON)
+    parser.add_argument("--engine", choices=list(ENGINES), default="prophet")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    table = ForecastTable()
+    for entity_type in args.entity or list(ENTITIES):
+        seasons = load_panel(ENTITIES[entity_type][0]).seasons
+        start = args.start or int(seasons[0])
+        end = args.end or int(seasons[-1])
+        jobs = list(
+            stale_series(
+                entity_type,
+                start,
+                end,
+                args.horizon,
+                args.metrics,
+                table,
+                args.engine,
+            )
+        )
+        logger.info("%s: %d series to forecast", entity_type, len(jobs))
+        count = run_batch(
+            table,
+            jobs,
+            args.workers,
+            lambda fraction, message: logger.info(message),
+        )
+        logger.info("%s: stored %d forecasts", entity_type, count)
+
+
+if __name__ == "__main__":
+    main()
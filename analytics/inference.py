@@ -0,0 +1,237 @@
+"""TensorFlow-free inference for the season forecasting models.
+
+A trained Random Forest is flattened into node arrays that are traversed for
+all (window, tree) pairs at once, and a Keras LSTM into its gate weights, whose
+forward pass is a few matrix products per lag. Both are saved together with
+the target scaler in one compressed .npz, so pages and batch jobs predict
+without importing TensorFlow or calling model.predict on a handful of rows.
+"""
+
+import json
+
+import numpy as np
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "linear": lambda x: x,
+}
+
+
+class NumpyForest:
+    """Random Forest regressor as concatenated node arrays of all its trees."""
+
+    def __init__(self, feature, threshold, left, right, value, roots):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.is_leaf = left == np.arange(len(left))
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        parts = {name: [] for name in ["feature", "threshold", "left", "right"]}
+        values, roots = [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            # Leaves point to themselves, which marks them for predict.
+            parts["feature"].append(np.where(leaf, 0, tree.feature))
+            parts["threshold"].append(tree.threshold)
+            parts["left"].append(np.where(leaf, nodes, tree.children_left) + offset)
+            parts["right"].append(np.where(leaf, nodes, tree.children_right) + offset)
+            values.append(tree.value.reshape(tree.node_count))
+            roots.append(offset)
+            offset += tree.node_count
+        arrays = {name: np.concatenate(p) for name, p in parts.items()}
+        return cls(
+            arrays["feature"].astype(np.int32),
+            arrays["threshold"],
+            arrays["left"].astype(np.int32),
+            arrays["right"].astype(np.int32),
+            np.concatenate(values),
+            np.array(roots, dtype=np.int32),
+        )
+
+    def predict(self, X):
+        # scikit-learn compares float32 features against float64 thresholds.
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        nodes = np.tile(self.roots, n_rows)
+        offsets = np.repeat(np.arange(n_rows) * n_features, len(self.roots))
+        # Only (window, tree) pairs that have not reached a leaf move down.
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            go_left = (
+                flat[offsets[active] + self.feature[current]] <= self.threshold[current]
+            )
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        return self.value[nodes].reshape(n_rows, -1).mean(axis=1)
+
+    def arrays(self):
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "roots": self.roots,
+        }
+
+
+class NumpyLSTM:
+    """Forward pass of a Sequential(LSTM, Dense) model with Keras weight layout.
+
+    kernel is (features, 4 * units) and recurrent (units, 4 * units), with the
+    gates in Keras order: input, forget, cell, output.
+    """
+
+    def __init__(
+        self,
+        kernel,
+        recurrent,
+        bias,
+        dense_kernel,
+        dense_bias,
+        activation="tanh",
+        recurrent_activation="sigmoid",
+    ):
+        self.kernel = kernel
+        self.recurrent = recurrent
+        self.bias = bias
+        self.dense_kernel = dense_kernel
+        self.dense_bias = dense_bias
+        self.activation = str(activation)
+        self.recurrent_activation = str(recurrent_activation)
+
+    @classmethod
+    def from_keras(cls, model):
+        layers = {type(layer).__name__: layer for layer in model.layers}
+        lstm, dense = layers["LSTM"], layers["Dense"]
+        config = lstm.get_config()
+        for name in [config["activation"], config["recurrent_activation"]]:
+            if name not in ACTIVATIONS:
+                raise ValueError(f"Unsupported LSTM activation: {name}")
+        if dense.get_config().get("activation", "linear") != "linear":
+            raise ValueError("Only a linear Dense output layer is supported")
+        kernel, recurrent, bias = lstm.get_weights()
+        dense_kernel, dense_bias = dense.get_weights()
+        return cls(
+            kernel,
+            recurrent,
+            bias,
+            dense_kernel,
+            dense_bias,
+            config["activation"],
+            config["recurrent_activation"],
+        )
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 2:
+            X = X[..., None]
+        act = ACTIVATIONS[self.activation]
+        gate = ACTIVATIONS[self.recurrent_activation]
+        units = self.recurrent.shape[0]
+        h = np.zeros((len(X), units))
+        c = np.zeros((len(X), units))
+        for t in range(X.shape[1]):
+            z = X[:, t] @ self.kernel + h @ self.recurrent + self.bias
+            i, f, g, o = np.split(z, 4, axis=1)
+            c = gate(f) * c + gate(i) * act(g)
+            h = gate(o) * act(c)
+        return (h @ self.dense_kernel + self.dense_bias).ravel()
+
+    def arrays(self):
+        return {
+            "kernel": self.kernel,
+            "recurrent": self.recurrent,
+            "bias": self.bias,
+            "dense_kernel": self.dense_kernel,
+            "dense_bias": self.dense_bias,
+            "activation": np.array(self.activation),
+            "recurrent_activation": np.array(self.recurrent_activation),
+        }
+
+
+MODEL_TYPES = {"Random Forest": ("rf", NumpyForest), "LSTM": ("lstm", NumpyLSTM)}
+
+
+class ExportedForecaster:
+    """Exported models of a PanelModels with the same predict interface."""
+
+    def __init__(self, metric, lags, mean, std, models):
+        self.metric = metric
+        self.lags = int(lags)
+        self.mean = float(mean)
+        self.std = float(std)
+        self.models = models
+        self.lag_cols = [f"lag_{i + 1}" for i in range(self.lags)]
+
+    @classmethod
+    def from_panel_models(cls, panel_models):
+        models = {}
+        if panel_models.rf is not None:
+            models["Random Forest"] = NumpyForest.from_sklearn(panel_models.rf)
+        if panel_models.lstm is not None:
+            models["LSTM"] = NumpyLSTM.from_keras(panel_models.lstm)
+        scaler = panel_models.scaler
+        return cls(
+            panel_models.metric,
+            panel_models.lags,
+            scaler.mean,
+            scaler.std,
+            models,
+        )
+
+    def predict(self, windows):
+        """{model name: predictions in original units} for lag windows.
+
+        windows is a frame with lag_1..lag_<lags> columns or an array of them.
+        """
+        if hasattr(windows, "columns"):
+            windows = windows[self.lag_cols].to_numpy()
+        X = (np.asarray(windows, dtype=float) - self.mean) / self.std
+        return {
+            name: model.predict(X) * self.std + self.mean
+            for name, model in self.models.items()
+        }
+
+    def save(self, path):
+        meta = {
+            "metric": self.metric,
+            "lags": self.lags,
+            "mean": self.mean,
+            "std": self.std,
+            "models": list(self.models),
+        }
+        arrays = {"meta": np.array(json.dumps(meta))}
+        for name, model in self.models.items():
+            prefix = MODEL_TYPES[name][0]
+            for key, value in model.arrays().items():
+                arrays[f"{prefix}.{key}"] = value
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            models = {}
+            for name in meta["models"]:
+                prefix, model_type = MODEL_TYPES[name]
+                kwargs = {
+                    key.split(".", 1)[1]: data[key]
+                    for key in data.files
+                    if key.startswith(prefix + ".")
+                }
+                models[name] = model_type(**kwargs)
+        return cls(meta["metric"], meta["lags"], meta["mean"], meta["std"], models)
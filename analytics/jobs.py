@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle of a background task that reports progress and can be cancelled.
+
+    The task receives the job and calls ``job.report(fraction, message)``
+    between steps; a cancelled job raises JobCancelled at the next report.
+    A job is shared by every session that submitted its key: each one
+    releases it when it no longer needs the result, and the job is cancelled
+    only when the last subscriber leaves.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._subscribers = 0
+
+    def report(self, progress, message=""):
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+        self.progress = progress
+        self.message = message
+
+    def cancel(self):
+        self._cancel.set()
+
+    def subscribe(self):
+        """Adds a subscriber; False if the job is already cancelled."""
+        with self._lock:
+            if self._cancel.is_set():
+                return False
+            self._subscribers += 1
+            return True
+
+    def release(self):
+        """Drops a subscriber and cancels the job when it was the last one."""
+        with self._lock:
+            self._subscribers -= 1
+            if self._subscribers <= 0:
+                self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _run(self, fn):
+        try:
+            self.result = fn(self)
+            self.progress = 1.0
+        except JobCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+
+class JobRunner:
+    """Runs jobs on a shared thread pool; identical keys share one running job.
+
+    Every submit subscribes the caller to the returned job; see Job.release.
+    """
+
+    def __init__(self, max_workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn):
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None and not job.done and job.subscribe():
+                return job
+            job = Job(key)
+            job.subscribe()
+            self._active[key] = job
+        future = self._pool.submit(job._run, fn)
+        future.add_done_callback(lambda _: self._forget(job))
+        return job
+
+    def _forget(self, job):
+        with self._lock:
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
@@ -0,0 +1,141 @@
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.inspection import permutation_importance
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+FEATURE_OPTS = ["Pace", "eFG_Pct", "TOV_Pct", "ORB_Pct", "FT_per_FGA"]
+LAST_TRAIN_SEASON = 2022
+BACKENDS = {"rf": "Random Forest", "hgb": "Histogram Gradient Boosting"}
+
+
+def build_match_frame(schedule, ff, feature_opts=FEATURE_OPTS):
+    """One row per game with home_/away_ four factors and their differences."""
+    ff_home = ff.rename(columns={c: f"home_{c}" for c in feature_opts})
+    ff_away = ff.rename(columns={c: f"away_{c}" for c in feature_opts})
+    df = schedule.merge(
+        ff_home[["Game_ID", "Team_ID"] + [f"home_{c}" for c in feature_opts]],
+        left_on=["Game_ID", "Home_Team_ID"],
+        right_on=["Game_ID", "Team_ID"],
+    ).drop(columns=["Team_ID"])
+    df = df.merge(
+        ff_away[["Game_ID", "Team_ID"] + [f"away_{c}" for c in feature_opts]],
+        left_on=["Game_ID", "Visitor_Team_ID"],
+        right_on=["Game_ID", "Team_ID"],
+    ).drop(columns=["Team_ID"])
+
+    for feat in feature_opts:
+        df[f"{feat}_diff"] = df[f"home_{feat}"] - df[f"away_{feat}"]
+    return df
+
+
+def split_by_season(df, feats, last_train_season=LAST_TRAIN_SEASON):
+    """Time split: seasons up to last_train_season train, later seasons test."""
+    train_mask = df["Season_End_Year"] <= last_train_season
+    return (
+        df.loc[train_mask, feats],
+        df.loc[train_mask, "Home_Win"],
+        df.loc[~train_mask, feats],
+        df.loc[~train_mask, "Home_Win"],
+    )
+
+
+def make_classifier(max_depth, n_estimators, n_jobs=-1, backend="rf"):
+    """Builds the classifier for a backend; n_estimators is the boosting
+    iteration count for "hgb", which bins features and fits multi-threaded."""
+    if backend == "hgb":
+        return HistGradientBoostingClassifier(
+            max_iter=int(n_estimators),
+            max_depth=int(max_depth),
+            early_stopping=False,
+            random_state=42,
+        )
+    return RandomForestClassifier(
+        n_estimators=int(n_estimators),
+        max_depth=int(max_depth),
+        random_state=42,
+        n_jobs=n_jobs,
+    )
+
+
+def set_size(clf, n_estimators):
+    """Sets the number of trees (RF) or boosting iterations (HGB)."""
+    if isinstance(clf, HistGradientBoostingClassifier):
+        return clf.set_params(max_iter=int(n_estimators))
+    return clf.set_params(n_estimators=int(n_estimators))
+
+
+def evaluate(clf, X_train, y_train, X_test, y_test, cv_scores):
+    """Collects the metrics shown on the match prediction page."""
+    y_pred = clf.predict(X_test)
+    return {
+        "train_acc": accuracy_score(y_train, clf.predict(X_train)),
+        "test_acc": accuracy_score(y_test, y_pred),
+        "cv_scores": np.asarray(cv_scores).tolist(),
+        "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
+        "classification_report": classification_report(
+            y_test, y_pred, output_dict=True
+        ),
+        "importances": dict(zip(X_train.columns, _importances(clf, X_test, y_test))),
+    }
+
+
+def _importances(clf, X_test, y_test):
+    if hasattr(clf, "feature_importances_"):
+        return clf.feature_importances_
+    result = permutation_importance(
+        clf, X_test, y_test, n_repeats=5, random_state=42, n_jobs=-1
+    )
+    return result.importances_mean
+
+
+def fit_and_evaluate(
+    df, feats, max_depth, n_estimators, n_jobs=-1, progress=None, backend="rf"
+):
+    """Fits the model and runs 5-fold CV, with the folds trained concurrently.
+
+    The five fold models (single-threaded each) and the final model (n_jobs
+    cores) are fitted on a thread pool; tree building releases the GIL.
+    progress(fraction, message) is polled while fits run; raising from it
+    returns at once, drops the fits that have not started yet and leaves the
+    running ones to finish in the background.
+    """
+    progress = progress or (lambda fraction, message: None)
+    X_train, y_train, X_test, y_test = split_by_season(df, feats)
+    clf = make_classifier(max_depth, n_estimators, n_jobs=n_jobs, backend=backend)
+    fold_clf = make_classifier(max_depth, n_estimators, n_jobs=1, backend=backend)
+    folds = list(StratifiedKFold(n_splits=5).split(X_train, y_train))
+    stopped = threading.Event()
+
+    def fit_fold(train_idx, val_idx):
+        if stopped.is_set():
+            return None
+        fitted = clone(fold_clf).fit(X_train.iloc[train_idx], y_train.iloc[train_idx])
+        return fitted.score(X_train.iloc[val_idx], y_train.iloc[val_idx])
+
+    progress(0.0, "Кросс-валидация и обучение итоговой модели")
+    workers = min(len(folds) + 1, os.cpu_count() or 1)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        final = pool.submit(clf.fit, X_train, y_train)
+        futures = [pool.submit(fit_fold, *fold) for fold in folds]
+        pending = {final, *futures}
+        while pending:
+            _, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            done = 6 - len(pending)
+            progress(done / 6, f"Обучено моделей: {done} из 6")
+    except BaseException:
+        # Give the caller's worker back now instead of waiting for the fits.
+        stopped.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    cv_scores = [future.result() for future in futures]
+    final.result()
+    return clf, evaluate(clf, X_train, y_train, X_test, y_test, cv_scores)
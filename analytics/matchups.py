@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+
+def base_features(feats):
+    return [f.removesuffix("_diff") for f in feats]
+
+
+def team_season_vectors(df, feature_opts):
+    """Average home and away feature vectors of every team in every season."""
+    home = df.groupby(["Season_End_Year", "Home_Team_ID"])[
+        [f"home_{f}" for f in feature_opts]
+    ].mean()
+    away = df.groupby(["Season_End_Year", "Visitor_Team_ID"])[
+        [f"away_{f}" for f in feature_opts]
+    ].mean()
+    home.columns = away.columns = list(feature_opts)
+    home.index.names = away.index.names = ["Season_End_Year", "Team"]
+    return home, away
+
+
+def probability_table(clf, home, away, feats):
+    """Home-win probability for every home/away pair of every season.
+
+    All pairs are scored with a single predict_proba call; the result is a
+    long frame indexed by (season, home, away).
+    """
+    base = base_features(feats)
+    blocks, keys = [], []
+    for season in home.index.get_level_values(0).unique():
+        if season not in away.index.get_level_values(0):
+            continue
+        h = home.loc[season, base]
+        a = away.loc[season, base]
+        diff = h.to_numpy()[:, None, :] - a.to_numpy()[None, :, :]
+        blocks.append(diff.reshape(-1, len(base)))
+        keys.append(
+            pd.MultiIndex.from_product(
+                [[season], h.index, a.index], names=["Season", "Home", "Away"]
+            )
+        )
+    if not blocks:
+        return pd.Series(dtype=float, name="Home_Win_Prob")
+    X = pd.DataFrame(np.vstack(blocks), columns=feats)
+    probs = clf.predict_proba(X)[:, 1]
+    return pd.Series(probs, index=keys[0].append(keys[1:]), name="Home_Win_Prob")
+
+
+def season_matrix(table, season):
+    """Home teams as rows, away teams as columns."""
+    return table.loc[season].unstack("Away")
@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from analytics.data import (
+    PER_GAME,
+    PLAYER_TOTALS,
+    TEAM_MISC,
+    TEAM_STANDINGS,
+    TOTALS,
+)
+
+# Column layout of the player tables that derived metrics are computed on.
+PLAYER_TABLES = {
+    PLAYER_TOTALS: {"team": "Tm", "season": "SeasonEndYear", "games": None},
+    TOTALS: {"team": "Tm_ID", "season": "Season_End_Year", "games": None},
+    PER_GAME: {"team": "Tm_ID", "season": "Season_End_Year", "games": "G"},
+}
+
+
+@dataclass(frozen=True)
+class DerivedMetric:
+    name: str
+    tables: tuple
+    description: str
+    compute: Callable
+    agg: str = "mean"
+
+
+DERIVED_METRICS = {}
+
+
+def derived_metric(name, tables, description, agg="mean"):
+    """Registers a vectorized metric computed as compute(df, table, load)."""
+
+    def register(compute):
+        DERIVED_METRICS[name] = DerivedMetric(
+            name, tuple(tables), description, compute, agg
+        )
+        return compute
+
+    return register
+
+
+def metrics_for(table):
+    return [m.name for m in DERIVED_METRICS.values() if table in m.tables]
+
+
+def describe(name):
+    return DERIVED_METRICS[name].description
+
+
+def apply_derived_metrics(table, df, load):
+    """Adds every metric registered for table as a regular column of df.
+
+    load(name) returns another (already derived) table, e.g. team pace.
+    """
+    metrics = [m for m in DERIVED_METRICS.values() if table in m.tables]
+    if not metrics:
+        return df
+    df = df.copy()
+    for metric in metrics:
+        values = metric.compute(df, table, load)
+        df[metric.name] = values.replace([np.inf, -np.inf], np.nan)
+    return df
+
+
+def _team_pace(df, team_col, season_col, load):
+    pace = load(TEAM_MISC).set_index(["Tm_ID", "Season_End_Year"])["Pace"]
+    keys = list(zip(df[team_col], df[season_col]))
+    return pace.reindex(keys).to_numpy()
+
+
+def _per_36(stat):
+    return lambda df, table, load: df[stat] / df["MP"] * 36
+
+
+def _per_100(stat):
+    def compute(df, table, load):
+        cols = PLAYER_TABLES[table]
+        pace = _team_pace(df, cols["team"], cols["season"], load)
+        possessions = df["MP"] / 48 * pace
+        return df[stat] / possessions * 100
+
+    return compute
+
+
+@derived_metric(
+    "TS_Pct",
+    PLAYER_TABLES,
+    "Истинный процент попаданий: PTS / (2 * (FGA + 0.44 * FTA))",
+)
+def _true_shooting(df, table, load):
+    return df["PTS"] / (2 * (df["FGA"] + 0.44 * df["FTA"]))
+
+
+for _stat, _label in [("PTS", "Очков"), ("TRB", "Подборов"), ("AST", "Передач")]:
+    derived_metric(
+        f"{_stat}_per36", PLAYER_TABLES, f"{_label} за 36 минут на площадке"
+    )(_per_36(_stat))
+    derived_metric(
+        f"{_stat}_per100", PLAYER_TABLES, f"{_label} на 100 владений команды"
+    )(_per_100(_stat))
+
+
+@derived_metric(
+    "USG_Pct",
+    PLAYER_TABLES,
+    "Доля владений команды, завершённых игроком, пока он на площадке",
+)
+def _usage(df, table, load):
+    cols = PLAYER_TABLES[table]
+    games = df[cols["games"]] if cols["games"] else 1
+    # Combined multi-team rows (2TM, 3TM, ...) have no team of their own.
+    is_team = df[cols["team"]].str.fullmatch(r"[A-Z]{3}").fillna(False).astype(bool)
+    team = df[cols["team"]].where(is_team)
+    possessions = df["FGA"] + 0.44 * df["FTA"] + df["TOV"]
+    grouped = df.assign(_poss=possessions * games, _mp=df["MP"] * games).groupby(
+        [team, df[cols["season"]]]
+    )
+    team_poss = grouped["_poss"].transform("sum")
+    team_mp = grouped["_mp"].transform("sum")
+    return 100 * possessions * (team_mp / 5) / (df["MP"] * team_poss)
+
+
+@derived_metric("Net_Rtg", [TEAM_MISC], "Чистый рейтинг: ORtg - DRtg")
+def _net_rating(df, table, load):
+    return df["ORtg"] - df["DRtg"]
+
+
+@derived_metric(
+    "MOV_per100", [TEAM_MISC], "Средняя разница очков на 100 владений (с учётом темпа)"
+)
+def _pace_adjusted_margin(df, table, load):
+    return df["MOV"] / df["Pace"] * 100
+
+
+def _standings_per_100(column):
+    def compute(df, table, load):
+        pace = _team_pace(df, "Tm_ID", "SeasonEndYear", load)
+        return df[column] / pace * 100
+
+    return compute
+
+
+derived_metric(
+    "PS_per100", [TEAM_STANDINGS], "Набрано очков на 100 владений (с учётом темпа)"
+)(_standings_per_100("PS/G"))
+derived_metric(
+    "PA_per100", [TEAM_STANDINGS], "Пропущено очков на 100 владений (с учётом темпа)"
+)(_standings_per_100("PA/G"))
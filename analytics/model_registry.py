@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+
+import joblib
+import pandas as pd
+
+from analytics.cache import LRUCache
+
+MODEL_DIR = os.environ.get("NBA_MODEL_DIR", "models")
+
+# A stored model that no longer unpickles (truncated file, renamed class or
+# module after a code change) is dropped and retrained.
+LOAD_ERRORS = (
+    OSError,
+    EOFError,
+    ValueError,
+    pickle.UnpicklingError,
+    AttributeError,
+    ImportError,
+)
+
+# Sweep params and ids are stored as text; read back as numbers they would no
+# longer match the fingerprint or id they are looked up by.
+SWEEP_TEXT_COLUMNS = ["data", "feature_set", "backend", "sweep_id"]
+
+logger = logging.getLogger(__name__)
+
+
+def params_key(params):
+    """Stable hash of a JSON-serializable parameter mapping."""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class ModelRegistry:
+    """Fitted models and their metrics persisted with joblib, evicted by LRU.
+
+    Each entry is stored as ``<key>.joblib``; ``index.json`` keeps the
+    parameters and last access time of every entry. Lookups only update the
+    access time in memory; the index is written on save and eviction.
+    """
+
+    def __init__(self, root=None, max_entries=50, memory_entries=8):
+        self.root = os.path.join(root or MODEL_DIR, "registry")
+        self.max_entries = max_entries
+        self.memory = LRUCache(maxsize=memory_entries, name="model_registry")
+        self._lock = threading.RLock()
+        self._last_used = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    def load(self, key):
+        """Returns the stored entry dict (model, metrics, params) or None."""
+        entry = self.memory.get(key)
+        if entry is None:
+            path = self._path(key)
+            if not os.path.exists(path):
+                return None
+            try:
+                entry = joblib.load(path)
+            except LOAD_ERRORS as e:
+                logger.warning("Dropping unreadable model %s: %s", key, e)
+                self._drop(key)
+                return None
+            self.memory.put(key, entry)
+        with self._lock:
+            self._last_used[key] = time.time()
+        return entry
+
+    def save(self, key, model, metrics, params):
+        entry = {
+            "model": model,
+            "metrics": metrics,
+            "params": params,
+            "created": time.time(),
+        }
+        tmp_path = self._path(key) + ".tmp"
+        joblib.dump(entry, tmp_path, compress=3)
+        os.replace(tmp_path, self._path(key))
+        self.memory.put(key, entry)
+        with self._lock:
+            index = self._index()
+            now = time.time()
+            index[key] = {"params": params, "created": now, "last_used": now}
+            self._evict(index)
+            self._write_index(index)
+        return entry
+
+    def entries(self):
+        """Index records sorted from most to least recently used."""
+        with self._lock:
+            index = self._index()
+        return sorted(
+            ({"key": key, **record} for key, record in index.items()),
+            key=lambda record: record["last_used"],
+            reverse=True,
+        )
+
+    def latest(self, **filters):
+        """Most recently created entry whose params match filters, or None."""
+        candidates = [
+            record
+            for record in self.entries()
+            if all(record["params"].get(k) == v for k, v in filters.items())
+        ]
+        if not candidates:
+            return None
+        newest = max(candidates, key=lambda r: r.get("created", r["last_used"]))
+        entry = self.load(newest["key"])
+        return None if entry is None else {"key": newest["key"], **entry}
+
+    def save_sweep(self, results, params):
+        """Appends a sweep's results table, tagged with a sweep id and its params."""
+        sweep_id = params_key({**params, "time": time.time()})
+        results = results.assign(
+            sweep_id=sweep_id,
+            created=pd.Timestamp.now().isoformat(timespec="seconds"),
+            **{k: str(v) for k, v in params.items()},
+        )
+        with self._lock:
+            sweeps = pd.concat([self.load_sweeps(), results], ignore_index=True)
+            path = os.path.join(self.root, "sweeps.csv")
+            sweeps.to_csv(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+        return sweep_id
+
+    def load_sweeps(self):
+        path = os.path.join(self.root, "sweeps.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_csv(path, dtype=dict.fromkeys(SWEEP_TEXT_COLUMNS, str))
+
+    def _index(self):
+        """The stored index with the access times of this process applied."""
+        index = self._read_index()
+        for key, last_used in self._last_used.items():
+            if key in index:
+                index[key]["last_used"] = max(index[key]["last_used"], last_used)
+        return index
+
+    def _drop(self, key):
+        with self._lock:
+            self.memory.discard(key)
+            self._last_used.pop(key, None)
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+            index = self._read_index()
+            if index.pop(key, None) is not None:
+                self._write_index(index)
+
+    def _evict(self, index):
+        by_age = sorted(index, key=lambda key: index[key]["last_used"])
+        for key in by_age[: max(0, len(index) - self.max_entries)]:
+            index.pop(key)
+            self.memory.discard(key)
+            self._last_used.pop(key, None)
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.joblib")
+
+    def _read_index(self):
+        path = os.path.join(self.root, "index.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_index(self, index):
+        path = os.path.join(self.root, "index.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, default=str)
+        os.replace(path + ".tmp", path)
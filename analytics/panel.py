@@ -0,0 +1,243 @@
+"""Dense entity x season x metric panels of the season tables.
+
+A panel holds one float array with NaN for seasons an entity did not play,
+built once per data version. Series, league-wide long frames, lag windows
+and normalization are all array operations on it, so the time-series,
+forecasting and ML tabs no longer filter and pivot per entity.
+"""
+
+import warnings
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from analytics.data import PER_GAME, TEAM_MISC, TOTALS, frame_fingerprint, load_table
+from analytics.metrics import DERIVED_METRICS
+
+SEASON_COL = "Season_End_Year"
+
+# table -> (entity column, games column used as weight, counting stats summed)
+PANEL_TABLES = {
+    PER_GAME: ("Player_Name_Stats", "G", False),
+    TOTALS: ("Player_Name_Stats", "G", True),
+    TEAM_MISC: ("Tm_ID", None, False),
+}
+
+
+def is_rate(metric):
+    return metric.endswith("_Pct") or metric in DERIVED_METRICS
+
+
+def aggregate_seasons(df, id_col, metrics, weight_col=None, counting=False):
+    """One row per (entity, season).
+
+    A traded player's stints are combined: counting totals (and the weight
+    column itself) are summed, everything else is averaged weighted by
+    weight_col.
+    """
+    keys = [df[id_col], df[SEASON_COL]]
+    summed = [m for m in metrics if (counting and not is_rate(m)) or m == weight_col]
+    averaged = [m for m in metrics if m not in summed]
+    parts = []
+    if summed:
+        parts.append(df[summed].groupby(keys).sum(min_count=1))
+    if averaged:
+        values = df[averaged]
+        weights = df[weight_col] if weight_col else pd.Series(1.0, index=df.index)
+        weights = values.notna().mul(weights, axis=0)
+        total = weights.groupby(keys).sum()
+        weighted = values.mul(weights).groupby(keys).sum(min_count=1)
+        parts.append(weighted / total.where(total > 0))
+    return pd.concat(parts, axis=1)[list(metrics)]
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Per-(entity, metric) or per-metric affine normalization of a panel."""
+
+    offset: np.ndarray
+    scale: np.ndarray
+
+    def transform(self, values):
+        return (values - self.offset) / self.scale
+
+    def inverse(self, values):
+        return values * self.scale + self.offset
+
+
+@dataclass(frozen=True)
+class Panel:
+    entities: np.ndarray
+    seasons: np.ndarray
+    metrics: tuple
+    values: np.ndarray
+    fingerprint: str = ""
+
+    @classmethod
+    def from_frame(cls, df, id_col, metrics, weight_col=None, counting=False):
+        metrics = tuple(metrics)
+        rows = aggregate_seasons(df, id_col, metrics, weight_col, counting)
+        entity_codes, entities = pd.factorize(rows.index.get_level_values(0), sort=True)
+        season_values = rows.index.get_level_values(1).to_numpy()
+        first = int(season_values.min())
+        seasons = np.arange(first, int(season_values.max()) + 1)
+        values = np.full((len(entities), len(seasons), len(metrics)), np.nan)
+        values[entity_codes, season_values - first] = rows.to_numpy(float)
+        return cls(
+            np.asarray(entities), seasons, metrics, values, frame_fingerprint(df)
+        )
+
+    def entity_index(self, entity):
+        position = np.searchsorted(self.entities, entity)
+        if position == len(self.entities) or self.entities[position] != entity:
+            raise KeyError(entity)
+        return position
+
+    def metric_index(self, metric):
+        return self.metrics.index(metric)
+
+    def slice(self, start=None, end=None, metrics=None):
+        """Sub-panel of the seasons start..end (inclusive) and the given metrics."""
+        lo = 0 if start is None else max(int(start) - self.seasons[0], 0)
+        hi = len(self.seasons) if end is None else int(end) - self.seasons[0] + 1
+        metrics = tuple(metrics) if metrics is not None else self.metrics
+        columns = [self.metric_index(m) for m in metrics]
+        values = self.values[:, lo:hi][:, :, columns]
+        return Panel(
+            self.entities, self.seasons[lo:hi], metrics, values, self.fingerprint
+        )
+
+    def subset(self, entities):
+        """Panel of the given entities only."""
+        rows = [self.entity_index(e) for e in entities]
+        return Panel(
+            self.entities[rows],
+            self.seasons,
+            self.metrics,
+            self.values[rows],
+            self.fingerprint,
+        )
+
+    def frame(self, entity, metrics=None, start=None, end=None):
+        """Season x metric frame of one entity, without seasons it missed."""
+        panel = self.slice(start, end, metrics)
+        values = panel.values[panel.entity_index(entity)]
+        frame = pd.DataFrame(
+            values,
+            index=pd.Index(panel.seasons, name=SEASON_COL),
+            columns=list(panel.metrics),
+        )
+        return frame.dropna(how="all")
+
+    def series(self, entity, metric, start=None, end=None):
+        return self.frame(entity, [metric], start, end)[metric].dropna()
+
+    def compare(self, entities, metric, start=None, end=None):
+        """Season x entity frame of one metric."""
+        panel = self.slice(start, end, [metric])
+        rows = [panel.entity_index(e) for e in entities]
+        return pd.DataFrame(
+            panel.values[rows, :, 0].T,
+            index=pd.Index(panel.seasons, name=SEASON_COL),
+            columns=list(entities),
+        ).dropna(how="all")
+
+    def long(self, metric, start=None, end=None):
+        """Series indexed by (entity, season) with every observed value."""
+        panel = self.slice(start, end, [metric])
+        matrix = panel.values[:, :, 0]
+        e, s = np.nonzero(~np.isnan(matrix))
+        index = pd.MultiIndex.from_arrays(
+            [panel.entities[e], panel.seasons[s]], names=["entity", SEASON_COL]
+        )
+        return pd.Series(matrix[e, s], index=index, name=metric)
+
+    def normalize(self, method="zscore", by="metric"):
+        """Normalized copy of the panel and the Scale that inverts it.
+
+        method is "zscore", "minmax" or "base" (first observed season = 100);
+        by is "metric" (league-wide statistics) or "entity" (per entity).
+        """
+        axis = (0, 1) if by == "metric" else (1,)
+        # Entities without any value of a metric produce all-NaN slices.
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            if method == "zscore":
+                offset = np.nanmean(self.values, axis=axis, keepdims=True)
+                scale = np.nanstd(self.values, axis=axis, keepdims=True)
+            elif method == "minmax":
+                offset = np.nanmin(self.values, axis=axis, keepdims=True)
+                scale = np.nanmax(self.values, axis=axis, keepdims=True) - offset
+            elif method == "base":
+                first = np.argmax(~np.isnan(self.values), axis=1)[:, None, :]
+                base = np.take_along_axis(self.values, first, axis=1)
+                offset, scale = np.zeros_like(base), base / 100
+            else:
+                raise ValueError(f"Unknown normalization: {method}")
+        scale = np.where((scale == 0) | np.isnan(scale), 1.0, scale)
+        result = Scale(np.nan_to_num(offset), scale)
+        normalized = Panel(
+            self.entities,
+            self.seasons,
+            self.metrics,
+            result.transform(self.values),
+            self.fingerprint,
+        )
+        return normalized, result
+
+    def windows(self, metric, lags, compact=True):
+        """Every window of lags seasons followed by a target season.
+
+        With compact, each entity's observed seasons are packed together first,
+        so a missed season does not break a window (as in a per-player loop
+        over the rows); otherwise windows need consecutive calendar seasons.
+        Returns (X, y, entity positions, target seasons, windows left after
+        this one for the same entity).
+        """
+        matrix = self.values[:, :, self.metric_index(metric)]
+        seasons = np.broadcast_to(self.seasons, matrix.shape)
+        if compact:
+            order = np.argsort(np.isnan(matrix), axis=1, kind="stable")
+            matrix = np.take_along_axis(matrix, order, axis=1)
+            seasons = np.take_along_axis(seasons, order, axis=1)
+        view = sliding_window_view(matrix, lags + 1, axis=1)
+        valid = ~np.isnan(view).any(axis=2)
+        remaining = np.cumsum(valid[:, ::-1], axis=1)[:, ::-1] - 1
+        e, w = np.nonzero(valid)
+        return (
+            view[e, w, :lags],
+            view[e, w, lags],
+            e,
+            seasons[e, w + lags],
+            remaining[e, w],
+        )
+
+    def lag_frame(self, metric, lags, test_windows=2, compact=True):
+        """Lag windows as a frame indexed by (entity, target season).
+
+        Columns are lag_1 (oldest) .. lag_<lags>, target and is_test, where
+        the last test_windows windows of every entity are the test set.
+        """
+        X, y, e, season, remaining = self.windows(metric, lags, compact)
+        frame = pd.DataFrame(X, columns=[f"lag_{i + 1}" for i in range(lags)])
+        frame["target"] = y
+        frame["is_test"] = remaining < test_windows
+        frame.index = pd.MultiIndex.from_arrays(
+            [self.entities[e], season], names=["entity", SEASON_COL]
+        )
+        return frame
+
+
+@lru_cache(maxsize=None)
+def load_panel(table):
+    """Panel of every numeric metric of a season table, built once per load."""
+    id_col, weight_col, counting = PANEL_TABLES[table]
+    df = load_table(table)
+    skip = {id_col, SEASON_COL, "Rk"}
+    metrics = [
+        c for c in df.columns if c not in skip and pd.api.types.is_numeric_dtype(df[c])
+    ]
+    return Panel.from_frame(df, id_col, metrics, weight_col, counting)
@@ -0,0 +1,157 @@
+"""League-wide (panel) season forecasting models.
+
+Lag windows of every player come from the season panel at once, and one
+Random Forest and one LSTM are trained across the league, so a player's
+prediction is a slice of a single batched inference call instead of a model
+fitted on a handful of that player's seasons.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+
+from analytics.inference import ExportedForecaster
+
+TEST_WINDOWS = 2
+MIN_VALIDATION_WINDOWS = 10
+
+
+class Standardizer:
+    """Shared z-scoring of lags and targets with statistics of the training set."""
+
+    def __init__(self, train_targets):
+        self.mean = float(np.mean(train_targets))
+        self.std = float(np.std(train_targets)) or 1.0
+
+    def transform(self, values):
+        return (np.asarray(values, dtype=float) - self.mean) / self.std
+
+    def inverse(self, values):
+        return np.asarray(values, dtype=float) * self.std + self.mean
+
+
+def make_lstm(lags, units, optimizer="adam"):
+    from tensorflow.keras.layers import LSTM, Dense, Input
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential([Input(shape=(lags, 1)), LSTM(int(units)), Dense(1)])
+    model.compile(optimizer=optimizer, loss="mse")
+    return model
+
+
+def train_lstm(model, X, y, epochs, batch_size, patience):
+    """Fits an LSTM with early stopping on a 10% validation split.
+
+    With fewer than MIN_VALIDATION_WINDOWS windows (a single player's series)
+    the split would be empty, so training stops early on the training loss.
+    """
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    validate = len(X) >= MIN_VALIDATION_WINDOWS
+    model.fit(
+        X,
+        y,
+        epochs=int(epochs),
+        batch_size=int(batch_size),
+        validation_split=0.1 if validate else 0.0,
+        verbose=0,
+        callbacks=[
+            EarlyStopping(
+                monitor="val_loss" if validate else "loss",
+                patience=int(patience),
+                restore_best_weights=True,
+            )
+        ],
+    )
+    return model
+
+
+class PanelModels:
+    """Global RF and LSTM trained on the lag windows of every player."""
+
+    def __init__(self, panel, metric, lags):
+        self.panel = panel
+        self.metric = metric
+        self.lags = lags
+        self.windows = panel.lag_frame(metric, lags, TEST_WINDOWS)
+        train = self.windows[~self.windows["is_test"]]
+        self.scaler = Standardizer(train["target"])
+        self.lag_cols = [f"lag_{i + 1}" for i in range(lags)]
+        self.rf = None
+        self.lstm = None
+        self.fit_seconds = {}
+
+    def _X(self, windows):
+        return self.scaler.transform(windows[self.lag_cols].to_numpy())
+
+    def fit_rf(self, n_estimators=100, n_jobs=-1):
+        start = time.perf_counter()
+        train = self.windows[~self.windows["is_test"]]
+        self.rf = RandomForestRegressor(
+            n_estimators=int(n_estimators), random_state=42, n_jobs=n_jobs
+        ).fit(self._X(train), self.scaler.transform(train["target"]))
+        self.fit_seconds["rf"] = time.perf_counter() - start
+        return self
+
+    def fit_lstm(
+        self, units=50, epochs=50, batch_size=256, patience=5, optimizer="adam"
+    ):
+        start = time.perf_counter()
+        train = self.windows[~self.windows["is_test"]]
+        X = self._X(train)[..., None]
+        y = self.scaler.transform(train["target"])
+        self.lstm = train_lstm(
+            make_lstm(self.lags, units, optimizer), X, y, epochs, batch_size, patience
+        )
+        self.fit_seconds["lstm"] = time.perf_counter() - start
+        return self
+
+    def models(self):
+        return {
+            name: model
+            for name, model in [("Random Forest", self.rf), ("LSTM", self.lstm)]
+            if model is not None
+        }
+
+    def predict(self, windows):
+        """{model name: predictions in original units} in one call per model."""
+        X = self._X(windows)
+        predictions = {}
+        for name, model in self.models().items():
+            if name == "LSTM":
+                raw = model.predict(X[..., None], batch_size=4096, verbose=0)
+            else:
+                raw = model.predict(X)
+            predictions[name] = self.scaler.inverse(np.ravel(raw))
+        return predictions
+
+    def export(self):
+        """TensorFlow-free copy of the trained models with the same predict."""
+        return ExportedForecaster.from_panel_models(self)
+
+    def test_mse(self, predictor=None):
+        """League-wide test MSE of every trained model, in original units."""
+        test = self.windows[self.windows["is_test"]]
+        return {
+            name: mean_squared_error(test["target"], pred)
+            for name, pred in (predictor or self).predict(test).items()
+        }
+
+    def player_windows(self, player):
+        if player not in self.windows.index.get_level_values(0):
+            return self.windows.iloc[:0]
+        return self.windows.loc[[player]]
+
+    def next_season(self, player):
+        """Window of the player's last lags seasons, for a next-season forecast."""
+        history = self.panel.series(player, self.metric)
+        if len(history) < self.lags:
+            return None
+        return pd.DataFrame(
+            [history.to_numpy()[-self.lags :]],
+            columns=self.lag_cols,
+            index=[history.index[-1] + 1],
+        )
@@ -0,0 +1,266 @@
+"""Per-rerun performance records of the dashboard pages.
+
+Every page run (and every lazy section rerun as a fragment) is a rerun
+record with named sections: data load, filtering, model fit, chart build.
+A section stores its wall time, the rows it processed and the bytes of the
+Streamlit messages it sent to the browser, i.e. the table and chart payload.
+A rerun also stores the process RSS and the hit/miss deltas of the in-process
+caches (named LRUCaches, load_table, load_panel). Those counters are
+process-wide: with concurrent sessions a rerun's deltas include their lookups.
+Streamlit keeps no hit counters for st.cache_data and st.cache_resource; their
+entries and sizes are reported by streamlit_caches().
+
+Records are kept in memory for the hidden diagnostics page. With
+NBA_PERF_LOG=<file> they are also appended to the file as JSON lines. With
+NBA_PROFILE_DIR=<dir>, the next rerun of each page is run under cProfile and
+dumped to <dir>/<page>-<pid>-<time>.prof.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import re
+import resource
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from analytics.cache import named_caches
+
+PERF_LOG = os.environ.get("NBA_PERF_LOG")
+PROFILE_DIR = os.environ.get("NBA_PROFILE_DIR")
+MAX_RECORDS = 500
+
+_records = deque(maxlen=MAX_RECORDS)
+_profiled = set()
+_lock = threading.Lock()
+_local = threading.local()
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes():
+    """Current resident set size of the process (peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cache_counters():
+    """Process-wide (hits, misses) of the in-process caches, by cache name."""
+    from analytics.data import load_table
+    from analytics.panel import load_panel
+
+    counters = {
+        name: (cache.hits, cache.misses) for name, cache in named_caches().items()
+    }
+    for function in [load_table, load_panel]:
+        info = function.cache_info()
+        counters[function.__name__] = (info.hits, info.misses)
+    return counters
+
+
+def streamlit_caches():
+    """{cache name: type, entries, bytes} of the Streamlit caches and session state.
+
+    st.cache_data and st.cache_resource entries are shared by all sessions,
+    st_session_state is per session. Streamlit does not size st.cache_resource
+    values, so their bytes are not meaningful. Empty outside a running app.
+    """
+    try:
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.stats import CACHE_MEMORY_FAMILY
+
+        stats = Runtime.instance().stats_mgr.get_stats(
+            family_names=[CACHE_MEMORY_FAMILY]
+        )
+    except (ImportError, RuntimeError):
+        return {}
+    caches = {}
+    for stat in stats.get(CACHE_MEMORY_FAMILY, []):
+        name = stat.cache_name or stat.category_name
+        cache = caches.setdefault(
+            name, {"type": stat.category_name, "entries": 0, "bytes": 0}
+        )
+        cache["entries"] += 1
+        cache["bytes"] += stat.byte_length
+    return caches
+
+
+class Section:
+    """Timing, row count and payload of one named part of a rerun."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.payload_bytes = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "seconds": self.seconds,
+            "rows": self.rows,
+            "payload_bytes": self.payload_bytes,
+        }
+
+
+class Rerun:
+    def __init__(self, page, kind):
+        self.page = page
+        self.kind = kind
+        self.sections = []
+        self.payload_bytes = 0
+        self._open = []
+
+    def count_message(self, msg):
+        # Only element deltas are payload; control messages are tiny.
+        if not msg.HasField("delta"):
+            return
+        size = msg.ByteSize()
+        self.payload_bytes += size
+        if self._open:
+            self._open[-1].payload_bytes += size
+
+
+def _script_context():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        return get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        return None
+
+
+@contextmanager
+def _count_payload(record):
+    """Counts the bytes of every message the script sends while active."""
+    ctx = _script_context()
+    enqueue = getattr(ctx, "_enqueue", None)
+    if enqueue is None:
+        yield
+        return
+
+    def counting_enqueue(msg):
+        record.count_message(msg)
+        enqueue(msg)
+
+    ctx._enqueue = counting_enqueue
+    try:
+        yield
+    finally:
+        ctx._enqueue = enqueue
+
+
+@contextmanager
+def rerun(page, kind="page"):
+    """Records one run of a page or fragment; nested calls become sections."""
+    if getattr(_local, "record", None) is not None:
+        with section(page):
+            yield
+        return
+    record = Rerun(page, kind)
+    profiler = _start_profiler(page) if kind == "page" else None
+    caches_before = cache_counters()
+    _local.record = record
+    start = time.perf_counter()
+    try:
+        with _count_payload(record):
+            yield record
+    finally:
+        seconds = time.perf_counter() - start
+        _local.record = None
+        if profiler is not None:
+            _dump_profile(profiler, page)
+        _finish(record, seconds, caches_before)
+
+
+@contextmanager
+def section(name):
+    """Times a named part of the current rerun; set .rows on the result.
+
+    Outside of a recorded rerun it only yields a detached Section.
+    """
+    current = Section(name)
+    record = getattr(_local, "record", None)
+    if record is not None:
+        record._open.append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        if record is not None:
+            record._open.pop()
+            record.sections.append(current)
+
+
+def _finish(record, seconds, caches_before):
+    caches = {}
+    for name, (hits, misses) in cache_counters().items():
+        hits_before, misses_before = caches_before.get(name, (0, 0))
+        if hits != hits_before or misses != misses_before:
+            caches[name] = {
+                "hits": hits - hits_before,
+                "misses": misses - misses_before,
+            }
+    entry = {
+        "time": time.time(),
+        "page": record.page,
+        "kind": record.kind,
+        "seconds": seconds,
+        "payload_bytes": record.payload_bytes,
+        "rss_bytes": rss_bytes(),
+        "caches": caches,
+        "sections": [s.as_dict() for s in record.sections],
+    }
+    with _lock:
+        _records.append(entry)
+    if PERF_LOG:
+        try:
+            with _lock, open(PERF_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning("Could not write the performance log: %s", e)
+
+
+def _start_profiler(page):
+    if not PROFILE_DIR:
+        return None
+    with _lock:
+        if page in _profiled:
+            return None
+        _profiled.add(page)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another session's rerun is being profiled right now.
+        with _lock:
+            _profiled.discard(page)
+        return None
+    return profiler
+
+
+def _dump_profile(profiler, page):
+    profiler.disable()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^\w-]+", "_", page).strip("_") or "page"
+    path = os.path.join(PROFILE_DIR, f"{slug}-{os.getpid()}-{int(time.time())}.prof")
+    profiler.dump_stats(path)
+    logger.info("Profile of one %s rerun written to %s", page, path)
+
+
+def records():
+    """Recorded reruns, oldest first."""
+    with _lock:
+        return list(_records)
+
+
+def clear():
+    with _lock:
+        _records.clear()
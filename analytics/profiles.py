@@ -0,0 +1,134 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import pandas as pd
+
+from analytics.cache import LRUCache
+from analytics.data import PER_GAME, PLAYER_TOTALS, SALARIES, load_table
+
+SHOOTING_COLS = ["FG_Pct", "3P_Pct", "FT_Pct"]
+HIGHLIGHT_STATS = ["PTS", "TRB", "AST", "Trp-Dbl"]
+
+
+@dataclass(frozen=True)
+class PlayerProfile:
+    """Everything the player view needs, computed once per player."""
+
+    player: str
+    totals: pd.DataFrame
+    per_game: pd.DataFrame
+    shooting: pd.DataFrame
+    ts_pct: pd.Series
+    season_highs: MappingProxyType
+    triple_doubles: pd.Series
+    salary: pd.Series
+
+    def totals_between(self, start_year, end_year):
+        seasons = self.totals["SeasonEndYear"].to_numpy()
+        lo = seasons.searchsorted(start_year, side="left")
+        hi = seasons.searchsorted(end_year, side="right")
+        return self.totals.iloc[lo:hi]
+
+    def season_highs_between(self, start_year, end_year):
+        """Season highs for a window; reuses the career values when it covers them."""
+        seasons = self.totals["SeasonEndYear"]
+        if seasons.empty or (
+            start_year <= seasons.iloc[0] and end_year >= seasons.iloc[-1]
+        ):
+            return self.season_highs
+        return _season_highs(self.totals_between(start_year, end_year))
+
+
+def _season_highs(totals):
+    highs = {}
+    for stat in HIGHLIGHT_STATS:
+        if stat in totals and totals[stat].notna().any():
+            highs[stat] = int(totals[stat].max())
+    return MappingProxyType(highs)
+
+
+class ProfileBuilder:
+    """Builds PlayerProfile bundles and keeps the most recent ones in an LRU cache."""
+
+    def __init__(self, player_totals, per_game, salaries, maxsize=256):
+        self._totals = player_totals.sort_values("SeasonEndYear", kind="stable")
+        self._per_game = per_game.sort_values("Season_End_Year", kind="stable")
+        self._salaries = salaries.sort_values("Season_End_Year", kind="stable")
+        self._totals_idx = self._totals.groupby("Player").indices
+        self._per_game_idx = self._per_game.groupby("Player_Name_Stats").indices
+        self._salary_idx = self._salaries.groupby("Player_In_Salary_Table").indices
+        self.cache = LRUCache(maxsize=maxsize, name="player_profiles")
+
+    @property
+    def players(self):
+        return sorted(self._totals_idx)
+
+    def get(self, player):
+        return self.cache.get_or_create(player, lambda: self.build(player))
+
+    def build(self, player):
+        totals = self._rows(self._totals, self._totals_idx, player)
+        per_game = self._rows(self._per_game, self._per_game_idx, player)
+        salary = self._rows(self._salaries, self._salary_idx, player)
+
+        per_game = per_game.set_index("Season_End_Year")
+        triple_doubles = totals.set_index("SeasonEndYear")["Trp-Dbl"]
+        salary = (
+            salary[["Season_End_Year", "Salary_Value"]]
+            .dropna()
+            .set_index("Season_End_Year")["Salary_Value"]
+        )
+        return PlayerProfile(
+            player=player,
+            totals=totals,
+            per_game=per_game,
+            shooting=per_game[SHOOTING_COLS],
+            ts_pct=per_game["TS_Pct"],
+            season_highs=_season_highs(totals),
+            triple_doubles=triple_doubles,
+            salary=salary,
+        )
+
+    def recent_players(self, n=None):
+        """Players ordered by their last season, most recent first."""
+        last_season = self._totals.groupby("Player")["SeasonEndYear"].max()
+        order = last_season.reset_index().sort_values(
+            ["SeasonEndYear", "Player"], ascending=[False, True], kind="stable"
+        )
+        return list(order["Player"].iloc[:n])
+
+    def precompute(self, players=None, max_workers=None):
+        """Builds bundles in parallel and loads them into the cache.
+
+        At most ``cache.maxsize`` players are built, so nothing is evicted
+        right away; by default those are the most recently active players.
+        """
+        limit = self.cache.maxsize
+        if players is None:
+            players = self.recent_players(limit)
+        else:
+            players = list(players)[:limit]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            profiles = list(pool.map(self.build, players))
+        # The first players are the likeliest to be opened: put them last, as
+        # the most recently used entries.
+        for player, profile in reversed(list(zip(players, profiles))):
+            self.cache.put(player, profile)
+        return len(players)
+
+    @staticmethod
+    def _rows(frame, index, player):
+        positions = index.get(player)
+        if positions is None:
+            return frame.iloc[0:0].reset_index(drop=True)
+        return frame.iloc[positions].reset_index(drop=True)
+
+
+@functools.lru_cache(maxsize=None)
+def default_builder():
+    """Process-wide builder over the dashboard datasets."""
+    return ProfileBuilder(
+        load_table(PLAYER_TOTALS), load_table(PER_GAME), load_table(SALARIES)
+    )
@@ -0,0 +1,181 @@
+"""Local HTTP scoring service for home-win probabilities.
+
+Loads the latest registered match model once, scores every home/away pair of
+every season in one batch, and answers requests with table lookups.
+
+    python -m analytics.scoring_api --port 8600
+
+Endpoints:
+    GET  /health
+    GET  /model
+    POST /predict   {"matchups": [{"season": 2024, "home": "BOS", "away": "NYK"}]}
+    POST /reload    reload the latest registered model
+"""
+
+import argparse
+import json
+import logging
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from analytics.data import load_table
+from analytics.feature_store import load_or_build
+from analytics.matches import build_match_frame
+from analytics.matchups import base_features, probability_table, team_season_vectors
+from analytics.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+Snapshot = namedtuple("Snapshot", "key params metrics probabilities seasons")
+
+
+def load_match_frame(feature_set):
+    schedule = load_table("games_schedule.csv")
+    ff = load_table("game_four_factors.csv")
+    if feature_set == "pregame":
+        return load_or_build(schedule, ff).match_frame(schedule)
+    return build_match_frame(schedule, ff)
+
+
+class MatchScorer:
+    """Precomputed probabilities of the latest registered model."""
+
+    def __init__(self, registry=None, **filters):
+        self.registry = registry or ModelRegistry()
+        self.filters = filters
+        self.reload()
+
+    def reload(self):
+        entry = self.registry.latest(**self.filters)
+        if entry is None:
+            raise LookupError("No registered match model; train one in the dashboard.")
+        feats = entry["params"]["features"]
+        df = load_match_frame(entry["params"].get("feature_set", "match"))
+        home, away = team_season_vectors(df, base_features(feats))
+        table = probability_table(entry["model"], home, away, feats)
+        probabilities = dict(zip(table.index, table.to_numpy().tolist()))
+        # Handler threads read without locking, so swap in one snapshot at once.
+        self._snapshot = Snapshot(
+            key=entry["key"],
+            params=entry["params"],
+            metrics=entry["metrics"],
+            probabilities=probabilities,
+            seasons=sorted({season for season, _, _ in probabilities}),
+        )
+        logger.info("Loaded model %s with %d matchups", entry["key"], len(table))
+
+    @property
+    def key(self):
+        return self._snapshot.key
+
+    @property
+    def probabilities(self):
+        return self._snapshot.probabilities
+
+    def score(self, matchups):
+        """Home-win probability per matchup; None for unknown teams or seasons."""
+        probabilities = self._snapshot.probabilities
+        return [
+            probabilities.get((int(m["season"]), m["home"], m["away"]))
+            for m in matchups
+        ]
+
+    def describe(self):
+        snapshot = self._snapshot
+        return {
+            "key": snapshot.key,
+            "params": snapshot.params,
+            "test_acc": snapshot.metrics["test_acc"],
+            "cv_mean": float(np.mean(snapshot.metrics["cv_scores"])),
+            "seasons": snapshot.seasons,
+            "matchups": len(snapshot.probabilities),
+        }
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Small JSON responses would otherwise wait on delayed ACKs.
+    disable_nagle_algorithm = True
+    scorer = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/model":
+            self._send(200, self.scorer.describe())
+        else:
+            self._send(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            self._send(400, {"error": f"invalid JSON: {e}"})
+            return
+        if self.path == "/predict":
+            matchups = body.get("matchups") if isinstance(body, dict) else None
+            if not isinstance(matchups, list):
+                self._send(400, {"error": "'matchups' must be a list"})
+                return
+            try:
+                probs = self.scorer.score(matchups)
+            except (KeyError, TypeError, ValueError) as e:
+                self._send(400, {"error": f"bad matchup: {e}"})
+                return
+            self._send(200, {"model": self.scorer.key, "home_win_prob": probs})
+        elif self.path == "/reload":
+            try:
+                self.scorer.reload()
+            except Exception as e:
+                # The previously loaded model, if any, keeps serving.
+                logger.exception("Model reload failed")
+                self._send(503, {"error": f"reload failed: {e}"})
+                return
+            self._send(200, self.scorer.describe())
+        else:
+            self._send(404, {"error": f"unknown path {self.path}"})
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def make_server(scorer, host="127.0.0.1", port=8600):
+    handler = type("BoundScoringHandler", (ScoringHandler,), {"scorer": scorer})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local match scoring API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--backend", help="Only serve models of this backend.")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    filters = {"backend": args.backend} if args.backend else {}
+    server = make_server(MatchScorer(**filters), args.host, args.port)
+    logger.info("Serving on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
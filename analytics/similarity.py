@@ -0,0 +1,69 @@
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from analytics.clustering import standardize
+
+# Above this many masked-out rows, filtered queries scan the matching rows
+# exactly instead of over-fetching from the tree.
+TREE_MAX_EXCLUDED = 256
+
+
+class SimilarityIndex:
+    """Nearest neighbours of entity-seasons on standardized stat vectors.
+
+    The scaler and a KD-tree are built once. Queries that mask out only a few
+    rows (the entity's own seasons) go through the tree; season or position
+    filters compute exact distances over the matching rows in one vectorized
+    pass.
+    """
+
+    def __init__(self, df, stats, id_col, season_col, position_col=None):
+        self.stats = list(stats)
+        self.id_col = id_col
+        self.season_col = season_col
+        self.position_col = position_col
+        self.rows = df.dropna(subset=self.stats).reset_index(drop=True)
+        _, self.X = standardize(self.rows[self.stats])
+        self.tree = KDTree(self.X)
+        self._ids = self.rows[id_col].to_numpy()
+        self._seasons = self.rows[season_col].to_numpy()
+        self._positions = self.rows[position_col].to_numpy() if position_col else None
+
+    def find(self, entity, season):
+        """Row positions of entity in season (several for traded players)."""
+        mask = (self._ids == entity) & (self._seasons == season)
+        return np.flatnonzero(mask)
+
+    def query(self, row, k=10, seasons=None, positions=None, exclude_same_entity=True):
+        """Top-k rows most similar to row, with their Euclidean distance."""
+        mask = np.ones(len(self.X), dtype=bool)
+        if seasons is not None:
+            mask &= (self._seasons >= seasons[0]) & (self._seasons <= seasons[1])
+        if positions and self._positions is not None:
+            mask &= np.isin(self._positions, list(positions))
+        if exclude_same_entity:
+            mask &= self._ids != self._ids[row]
+        mask[row] = False
+
+        excluded = len(mask) - int(mask.sum())
+        if excluded <= TREE_MAX_EXCLUDED:
+            # Fetching k + excluded neighbours is enough to fill k after masking.
+            fetch = min(k + excluded, len(self.X))
+            dist, idx = self.tree.query(self.X[row : row + 1], k=fetch)
+            keep = mask[idx[0]]
+            idx, dist = idx[0][keep][:k], dist[0][keep][:k]
+        else:
+            candidates = np.flatnonzero(mask)
+            distances = np.linalg.norm(self.X[candidates] - self.X[row], axis=1)
+            if len(distances) > k:
+                top = np.argpartition(distances, k)[:k]
+            else:
+                top = np.arange(len(distances))
+            top = top[np.argsort(distances[top])]
+            idx, dist = candidates[top], distances[top]
+        result = self.rows.iloc[idx][
+            [self.id_col, self.season_col]
+            + ([self.position_col] if self.position_col else [])
+            + self.stats
+        ]
+        return result.assign(Distance=dist).reset_index(drop=True)
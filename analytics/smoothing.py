@@ -0,0 +1,127 @@
+"""Damped-trend exponential smoothing over many yearly series at once.
+
+Series are rows of a (n_series, n_seasons) matrix with NaN for seasons
+without data. Holt's recursion runs over the columns, so fitting the whole
+league costs n_seasons vectorized steps per parameter combination, and the
+smoothing parameters are picked per series from a small grid by one-step
+squared error.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+ALPHAS = (0.2, 0.4, 0.6, 0.8, 1.0)
+BETAS = (0.0, 0.1, 0.2, 0.4)
+PHI = 0.9
+Z_90 = 1.645
+
+
+def series_matrix(values):
+    """(ids, seasons, matrix) from a Series indexed by (entity, season)."""
+    wide = values.unstack(level=1)
+    seasons = range(int(wide.columns.min()), int(wide.columns.max()) + 1)
+    wide = wide.reindex(columns=seasons)
+    return wide.index.to_numpy(), wide.columns.to_numpy(), wide.to_numpy(float)
+
+
+def holt_damped(Y, alpha, beta, phi=PHI):
+    """One pass of the recursion with per-series alpha and beta.
+
+    Returns the one-step SSE and error count, and the level, trend and column
+    of each series' last observation. The first observation sets the level
+    with a flat trend; seasons without data carry the state forward.
+    """
+    n, T = Y.shape
+    level = np.zeros(n)
+    trend = np.zeros(n)
+    started = np.zeros(n, dtype=bool)
+    sse = np.zeros(n)
+    n_errors = np.zeros(n, dtype=int)
+    last_level = np.full(n, np.nan)
+    last_trend = np.zeros(n)
+    last_t = np.full(n, -1)
+    for t in range(T):
+        y = Y[:, t]
+        obs = ~np.isnan(y)
+        first = obs & ~started
+        update = obs & started
+
+        forecast = level + phi * trend
+        error = np.where(update, y - forecast, 0.0)
+        sse += error**2
+        n_errors += update
+
+        level = np.where(first, y, forecast + alpha * error)
+        trend = np.where(first, 0.0, phi * trend + alpha * beta * error)
+        started |= obs
+        last_level = np.where(obs, level, last_level)
+        last_trend = np.where(obs, trend, last_trend)
+        last_t = np.where(obs, t, last_t)
+    return sse, n_errors, last_level, last_trend, last_t
+
+
+def fit(Y, phi=PHI, alphas=ALPHAS, betas=BETAS):
+    """Best (alpha, beta) per series and the state fitted with it."""
+    best = None
+    for alpha, beta in itertools.product(alphas, betas):
+        a = np.full(len(Y), alpha)
+        b = np.full(len(Y), beta)
+        sse, n_errors, level, trend, last_t = holt_damped(Y, a, b, phi)
+        if best is None:
+            best = [a, b, sse, n_errors, level, trend, last_t]
+            continue
+        better = sse < best[2]
+        for i, value in enumerate([a, b, sse, n_errors, level, trend, last_t]):
+            best[i] = np.where(better, value, best[i])
+    return best
+
+
+def forecast_matrix(Y, horizon, phi=PHI, z=Z_90):
+    """Point forecasts and intervals for horizon steps after each last observation.
+
+    Interval widths follow the ETS(A,Ad,N) variance formula with sigma taken
+    from each series' one-step errors.
+    """
+    alpha, beta, sse, n_errors, level, trend, last_t = fit(Y, phi)
+    steps = np.arange(1, horizon + 1)
+    damping = np.cumsum(phi**steps)
+    yhat = level[:, None] + damping[None, :] * trend[:, None]
+
+    sigma = np.sqrt(sse / np.maximum(n_errors, 1))
+    sigma = np.where(n_errors > 0, sigma, np.nanstd(Y, axis=1))
+    # c_j = alpha * (1 + beta * (phi + ... + phi^j)) for j = 1..h-1
+    c = alpha[:, None] * (1 + beta[:, None] * damping[None, :-1])
+    variance = np.concatenate(
+        [np.ones((len(Y), 1)), 1 + np.cumsum(c**2, axis=1)], axis=1
+    )
+    half_width = z * sigma[:, None] * np.sqrt(variance)
+    return yhat, yhat - half_width, yhat + half_width, last_t
+
+
+def forecast_frame(values, horizon):
+    """Forecast of every series in a Series indexed by (entity, season).
+
+    Returns one row per (entity, season ahead) with yhat and its 90% interval.
+    """
+    ids, seasons, Y = series_matrix(values)
+    yhat, lower, upper, last_t = forecast_matrix(Y, horizon)
+    steps = np.arange(1, horizon + 1)
+    return pd.DataFrame(
+        {
+            "entity": np.repeat(ids, horizon),
+            "Season": (seasons[last_t][:, None] + steps[None, :]).ravel(),
+            "yhat": yhat.ravel(),
+            "yhat_lower": lower.ravel(),
+            "yhat_upper": upper.ravel(),
+        }
+    )
+
+
+def ets_forecast(series, horizon):
+    """Single-series forecast with the same columns as prophet_forecast."""
+    values = pd.Series(
+        series.to_numpy(), index=pd.MultiIndex.from_product([[0], series.index])
+    )
+    return forecast_frame(values, horizon).drop(columns="entity")
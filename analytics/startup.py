@@ -0,0 +1,98 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+from analytics.data import DASHBOARD_TABLES, load_table
+
+PROCESS_START = time.perf_counter()
+
+HEAVY_MODULES = [
+    "altair",
+    "sklearn.ensemble",
+    "sklearn.cluster",
+    "sklearn.decomposition",
+    "prophet",
+    "tensorflow",
+]
+
+_profile = {"imports": {}, "first_paint": {}, "warmup": {}}
+_lock = threading.Lock()
+_warmup_thread = None
+
+logger = logging.getLogger(__name__)
+
+
+def timed_import(module_name):
+    """Imports a module and records how long the first import took.
+
+    Modules that are already loaded are not recorded, so the profile only has
+    real import times.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+    with _lock:
+        _profile["imports"].setdefault(module_name, elapsed)
+    return module
+
+
+def record_first_paint(page, seconds):
+    """Stores the render time of the first run of a page in this process."""
+    with _lock:
+        if page in _profile["first_paint"]:
+            return
+        _profile["first_paint"][page] = {
+            "render_s": seconds,
+            "since_process_start_s": time.perf_counter() - PROCESS_START,
+        }
+    logger.info("First paint of %s: %.3fs", page, seconds)
+
+
+def startup_profile():
+    with _lock:
+        return {key: dict(value) for key, value in _profile.items()}
+
+
+def warmup_enabled():
+    return os.environ.get("NBA_WARMUP", "0") == "1"
+
+
+def start_warmup():
+    """Starts the background warm-up once per process, if NBA_WARMUP=1.
+
+    Off by default: the warm-up imports every page's libraries (TensorFlow,
+    Prophet), which costs CPU and memory even if those pages are never opened.
+    """
+    global _warmup_thread
+    if not warmup_enabled():
+        return None
+    with _lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(
+                target=_warmup, name="nba-warmup", daemon=True
+            )
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+def _warmup():
+    start = time.perf_counter()
+    for module_name in HEAVY_MODULES:
+        try:
+            timed_import(module_name)
+        except ImportError as e:
+            logger.warning("Warm-up could not import %s: %s", module_name, e)
+    for name in DASHBOARD_TABLES:
+        load_table(name)
+
+    from analytics.profiles import default_builder
+
+    default_builder()
+    with _lock:
+        _profile["warmup"]["total_s"] = time.perf_counter() - start
+    logger.info("Warm-up finished in %.2fs", time.perf_counter() - start)
@@ -0,0 +1,125 @@
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+from threadpoolctl import threadpool_limits
+
+from analytics.matches import make_classifier, set_size, split_by_season
+
+
+def grid_configs(max_depths, n_estimators, feature_subsets):
+    return [
+        {"features": list(feats), "max_depth": int(d), "n_estimators": int(n)}
+        for feats, d, n in itertools.product(feature_subsets, max_depths, n_estimators)
+    ]
+
+
+def random_configs(max_depths, n_estimators, feature_subsets, n_iter, seed=42):
+    configs = grid_configs(max_depths, n_estimators, feature_subsets)
+    return random.Random(seed).sample(configs, min(n_iter, len(configs)))
+
+
+def group_configs(configs):
+    """Groups configs that differ only in n_estimators, so forests can grow."""
+    groups = {}
+    for config in configs:
+        key = (tuple(config["features"]), config["max_depth"])
+        groups.setdefault(key, set()).add(config["n_estimators"])
+    return [(list(feats), depth, sorted(ns)) for (feats, depth), ns in groups.items()]
+
+
+def evaluate_group(
+    X_train, y_train, X_test, y_test, max_depth, n_estimators_list, backend="rf"
+):
+    """Grows warm-started ensembles through n_estimators_list.
+
+    The full model and the five CV fold models keep their trees between steps,
+    so each step only fits the additional trees (or boosting iterations).
+    """
+    folds = list(StratifiedKFold(n_splits=5).split(X_train, y_train))
+    models = [
+        make_classifier(
+            max_depth, n_estimators_list[0], n_jobs=1, backend=backend
+        ).set_params(warm_start=True)
+        for _ in range(len(folds) + 1)
+    ]
+    rows = []
+    for n in n_estimators_list:
+        start = time.perf_counter()
+        cv_scores = []
+        for model, (train_idx, val_idx) in zip(models, folds):
+            set_size(model, n).fit(X_train[train_idx], y_train[train_idx])
+            cv_scores.append(model.score(X_train[val_idx], y_train[val_idx]))
+        full = set_size(models[-1], n).fit(X_train, y_train)
+        rows.append(
+            {
+                "max_depth": max_depth,
+                "n_estimators": n,
+                "train_acc": full.score(X_train, y_train),
+                "test_acc": full.score(X_test, y_test),
+                "cv_mean": float(np.mean(cv_scores)),
+                "cv_std": float(np.std(cv_scores)),
+                "fit_time_s": time.perf_counter() - start,
+            }
+        )
+    return rows
+
+
+def _single_threaded_worker():
+    # The pool already runs one process per core; without a cap every HGB fit
+    # would also start an OpenMP thread per core.
+    threadpool_limits(limits=1)
+
+
+def run_sweep(df, configs, max_workers=None, progress=None, backend="rf"):
+    """Evaluates configs in a process pool and returns results sorted by CV mean.
+
+    fit_time_s is the time of the step that grew the forest to n_estimators,
+    i.e. only the added trees for warm-started configurations.
+    """
+    progress = progress or (lambda fraction, message: None)
+    groups = group_configs(configs)
+    rows = []
+    # Spawned, not forked: the caller is a thread of the multithreaded server.
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_single_threaded_worker,
+    ) as pool:
+        futures = {}
+        for feats, depth, ns in groups:
+            X_train, y_train, X_test, y_test = split_by_season(df, feats)
+            future = pool.submit(
+                evaluate_group,
+                X_train.to_numpy(),
+                y_train.to_numpy(),
+                X_test.to_numpy(),
+                y_test.to_numpy(),
+                depth,
+                ns,
+                backend,
+            )
+            futures[future] = feats
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                feats = futures[future]
+                for row in future.result():
+                    rows.append(
+                        {"features": ", ".join(feats), "n_features": len(feats), **row}
+                    )
+                progress(done / len(futures), f"Готово групп: {done} из {len(futures)}")
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    return results.sort_values(
+        ["cv_mean", "test_acc"], ascending=False, ignore_index=True
+    )
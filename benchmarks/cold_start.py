@@ -0,0 +1,151 @@
+"""Cold-start benchmark for the dashboard.
+
+Measures, each in a fresh interpreter so nothing is cached:
+  * import time of the heavy libraries used by the pages;
+  * time for main.py to reach first paint (default page rendered);
+  * time to first paint of every page run on its own.
+
+Run from the repository root:
+    python -m benchmarks.cold_start --repeat 5 --output cold_start.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from analytics.startup import HEAVY_MODULES
+from page_source.navigation import PAGES
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+FIRST_PAINT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.{factory}({target!r}, default_timeout={timeout})
+at.run()
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "streamlit_import_s": imported - start,
+    "errors": [str(e.value) for e in at.exception],
+}}))
+"""
+
+
+def run_snippet(code, timeout):
+    env = dict(os.environ, NBA_WARMUP="0")
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        wall = time.perf_counter() - start
+        return {
+            "error": f"timed out after {timeout}s",
+            "timeout": True,
+            "process_s": wall,
+        }
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1:], "process_s": wall}
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_s"] = wall
+    return result
+
+
+def summarize(runs):
+    ok = [r for r in runs if "error" not in r and not r.get("errors")]
+    summary = {"runs": runs}
+    if ok:
+        seconds = [r["seconds"] for r in ok]
+        summary.update(
+            median_s=statistics.median(seconds), min_s=min(seconds), max_s=max(seconds)
+        )
+    return summary
+
+
+def bench_imports(repeat, timeout):
+    results = {}
+    for module in HEAVY_MODULES:
+        runs = [
+            run_snippet(IMPORT_SNIPPET.format(module=module), timeout)
+            for _ in range(repeat)
+        ]
+        results[module] = summarize(runs)
+    return results
+
+
+def bench_main(repeat, timeout):
+    code = FIRST_PAINT_SNIPPET.format(
+        factory="from_file", target="main.py", timeout=timeout
+    )
+    return summarize([run_snippet(code, timeout) for _ in range(repeat)])
+
+
+def bench_pages(repeat, timeout):
+    results = {}
+    for title, module, _ in PAGES:
+        code = FIRST_PAINT_SNIPPET.format(
+            factory="from_string",
+            target=f"from {module} import app\napp()",
+            timeout=timeout,
+        )
+        results[title] = summarize([run_snippet(code, timeout) for _ in range(repeat)])
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=int, default=600)
+    parser.add_argument("--skip-pages", action="store_true")
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "imports": bench_imports(args.repeat, args.timeout),
+        "main_first_paint": bench_main(args.repeat, args.timeout),
+    }
+    if not args.skip_pages:
+        report["page_first_paint"] = bench_pages(args.repeat, args.timeout)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Backtest of the forecasting engines on the same holdout seasons.
+
+For every series with enough history, the last --holdout observed seasons
+are hidden, each engine forecasts them from the rest, and the report gives
+MAE, RMSE, 90% interval coverage and fit time. Prophet is slow, so it runs on
+a random sample of the series (--prophet-sample) and is skipped when it is
+not installed; the other engines are scored on the same sample as well.
+
+Run from the repository root:
+    python -m benchmarks.forecast_engines --entity player --metrics PTS AST
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics.forecasts import ENTITIES, MIN_SEASONS, prophet_forecast
+from analytics.panel import load_panel
+from analytics.smoothing import forecast_frame
+
+
+def split_series(entity_type, metric, holdout):
+    values = load_panel(ENTITIES[entity_type][0]).long(metric)
+    sizes = values.groupby(level=0).transform("size")
+    values = values[sizes >= MIN_SEASONS + holdout]
+    position = values.groupby(level=0).cumcount(ascending=False)
+    return values[position >= holdout], values[position < holdout]
+
+
+def score(forecast, actual):
+    """Joins forecasts to the hidden seasons they cover and computes errors."""
+    actual = actual.rename("y").rename_axis(["entity", "Season"]).reset_index()
+    joined = actual.merge(forecast, on=["entity", "Season"], how="left")
+    error = joined["y"] - joined["yhat"]
+    covered = (joined["y"] >= joined["yhat_lower"]) & (
+        joined["y"] <= joined["yhat_upper"]
+    )
+    return {
+        "series": int(joined["entity"].nunique()),
+        "points": int(error.notna().sum()),
+        "mae": float(error.abs().mean()),
+        "rmse": float(np.sqrt((error**2).mean())),
+        "coverage_90": float(covered[error.notna()].mean()),
+    }
+
+
+def naive_forecast(history, horizon):
+    """Last value with intervals from the spread of yearly changes."""
+    last = history.groupby(level=0).last()
+    last_season = history.reset_index(level=1).groupby(level=0)["Season_End_Year"]
+    spread = history.groupby(level=0).diff().groupby(level=0).std().fillna(0)
+    rows = []
+    for h in range(1, horizon + 1):
+        half_width = 1.645 * spread * np.sqrt(h)
+        rows.append(
+            pd.DataFrame(
+                {
+                    "entity": last.index,
+                    "Season": last_season.max().to_numpy() + h,
+                    "yhat": last.to_numpy(),
+                    "yhat_lower": (last - half_width).to_numpy(),
+                    "yhat_upper": (last + half_width).to_numpy(),
+                }
+            )
+        )
+    return pd.concat(rows, ignore_index=True)
+
+
+def prophet_batch(history, horizon):
+    frames = []
+    for entity, series in history.groupby(level=0):
+        forecast = prophet_forecast(series.droplevel(0), horizon)
+        frames.append(forecast.assign(entity=entity))
+    return pd.concat(frames, ignore_index=True)
+
+
+def backtest(history, actual, holdout, engines):
+    rows = []
+    for name, engine in engines.items():
+        start = time.perf_counter()
+        forecast = engine(history, holdout)
+        fit_s = time.perf_counter() - start
+        result = score(forecast, actual)
+        rows.append(
+            {
+                "engine": name,
+                **result,
+                "fit_s": fit_s,
+                "ms_per_series": fit_s / max(result["series"], 1) * 1e3,
+            }
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entity", choices=list(ENTITIES), default="player")
+    parser.add_argument("--metrics", nargs="+", default=["PTS"])
+    parser.add_argument("--holdout", type=int, default=3)
+    parser.add_argument("--prophet-sample", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    try:
+        import prophet  # noqa: F401
+
+        has_prophet = True
+    except ImportError:
+        has_prophet = False
+        print("Prophet is not installed; comparing the NumPy engines only.")
+
+    engines = {"naive": naive_forecast, "ets": forecast_frame}
+    rows = []
+    for metric in args.metrics:
+        history, actual = split_series(args.entity, metric, args.holdout)
+        for label, sample in [("all", None), ("sample", args.prophet_sample)]:
+            if sample is not None and not has_prophet:
+                continue
+            h, a = history, actual
+            if sample is not None:
+                ids = history.index.get_level_values(0).unique().to_series()
+                ids = ids.sample(min(sample, len(ids)), random_state=args.seed)
+                h = history[history.index.get_level_values(0).isin(ids)]
+                a = actual[actual.index.get_level_values(0).isin(ids)]
+            run = dict(engines)
+            if sample is not None:
+                run["prophet"] = prophet_batch
+            for row in backtest(h, a, args.holdout, run):
+                rows.append({"metric": metric, "series_set": label, **row})
+
+    print(pd.DataFrame(rows).to_string(index=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
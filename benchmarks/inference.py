@@ -0,0 +1,122 @@
+"""Native vs exported NumPy inference of the season forecasting models.
+
+Trains the league-wide models of the LSTM vs Random Forest page (the LSTM
+only when TensorFlow is installed), exports them to an .npz artifact,
+reloads it and reports the largest prediction difference against the
+native models and the per-call latency of both paths for several batch
+sizes, plus the artifact size and the TensorFlow import time.
+
+Run from the repository root:
+    python -m benchmarks.inference --metric PTS --batch-sizes 1 32 1024
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from analytics.data import TOTALS
+from analytics.inference import ExportedForecaster
+from analytics.panel import load_panel
+from analytics.panel_models import PanelModels
+
+
+def import_seconds(module):
+    """Import time of a module in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+    return time.perf_counter() - start
+
+
+def per_call_ms(predict, windows, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(windows)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--metric", default="PTS")
+    parser.add_argument("--lags", type=int, default=3)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--lstm-epochs", type=int, default=20)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1024])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    models = PanelModels(load_panel(TOTALS), args.metric, args.lags)
+    models.fit_rf(args.trees)
+    has_tensorflow = importlib.util.find_spec("tensorflow") is not None
+    if has_tensorflow:
+        models.fit_lstm(epochs=args.lstm_epochs)
+    else:
+        print("TensorFlow is not installed; benchmarking the Random Forest only.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "forecaster.npz")
+        models.export().save(path)
+        artifact_kb = os.path.getsize(path) / 1024
+        exported = ExportedForecaster.load(path)
+
+    windows = models.windows
+    native = models.predict(windows)
+    numpy_pred = exported.predict(windows)
+    scale = float(np.abs(windows["target"]).max()) or 1.0
+    rows = []
+    for name in native:
+        max_diff = float(np.max(np.abs(native[name] - numpy_pred[name])))
+        for size in args.batch_sizes:
+            batch = windows.iloc[:size]
+            rows.append(
+                {
+                    "model": name,
+                    "batch": len(batch),
+                    "native_ms": per_call_ms(
+                        lambda w: models.predict(w)[name], batch, args.repeat
+                    ),
+                    "numpy_ms": per_call_ms(
+                        lambda w: exported.predict(w)[name], batch, args.repeat
+                    ),
+                    "max_abs_diff": max_diff,
+                    "within_tolerance": max_diff <= args.tolerance * scale,
+                }
+            )
+    report = {
+        "metric": args.metric,
+        "windows": len(windows),
+        "artifact_kb": artifact_kb,
+        "tensorflow_import_s": (
+            import_seconds("tensorflow") if has_tensorflow else None
+        ),
+        "results": rows,
+    }
+    for row in rows:
+        print(
+            f"{row['model']:>13} batch {row['batch']:>5}: "
+            f"native {row['native_ms']:8.3f} ms, numpy {row['numpy_ms']:8.3f} ms, "
+            f"max |diff| {row['max_abs_diff']:.2e}"
+        )
+    print(f"artifact {artifact_kb:.0f} KB")
+    if report["tensorflow_import_s"] is not None:
+        print(f"import tensorflow: {report['tensorflow_import_s']:.2f} s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if not all(row["within_tolerance"] for row in rows):
+        sys.exit("Exported predictions differ from the native models")
+
+
+if __name__ == "__main__":
+    main()
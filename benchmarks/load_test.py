@@ -0,0 +1,365 @@
+"""Multi-session load test of a running dashboard server.
+
+Opens N concurrent sessions over Streamlit's websocket protocol, the same
+messages the browser sends, and lets each of them wander through the tabs:
+open a random tab, then change its widgets (player, N, K, tree depth) with
+a think time in between. Widget changes inside a fragment rerun only that
+fragment, as in the browser. For every number of sessions the report has
+p50/p95 rerun latency, reruns per second, the server RSS and the server's own
+memory accounting from /_stcore/metrics:
+
+  * st_cache_data and st_cache_resource entries are shared by all sessions,
+    but st.cache_data stores a pickle and hands every call an unpickled copy
+    of the value, while st.cache_resource returns the one shared object;
+  * st_session_state is per session and grows with N.
+
+Without --url a server is started on a free port and stopped at the end.
+
+Run from the repository root:
+    python -m benchmarks.load_test --sessions 1 4 8 16 --duration 60
+    python -m benchmarks.load_test --url http://localhost:8501 --pid 1234
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+PLAYERS = ["LeBron James", "Stephen Curry", "Kevin Durant", "Tim Duncan"]
+
+# url_path -> [(widget type, label, values to pick from)]
+WORKLOADS = {
+    "stats": [("selectbox", "Select Player:", PLAYERS)],
+    "top-n": [
+        ("slider", "Выберите N (количество записей):", [3, 5, 10, 20]),
+        ("selectbox", "Выберите метрику:", ["PTS", "TRB", "AST"]),
+    ],
+    "time-series": [("selectbox", "Выберите игрока:", PLAYERS)],
+    "forecast": [("selectbox", "Выберите игрока:", PLAYERS)],
+    "clustering": [("slider", "Количество кластеров (K):", [3, 4, 5, 6])],
+    "match-prediction": [("slider", "Максимальная глубина дерева:", [3, 5, 8])],
+    "sklearn-vs-tensorflow": [("selectbox", "Выберите игрока", PLAYERS)],
+}
+
+METRIC_LINE = re.compile(r"^(\w+)\{(.*)\} (\S+)$")
+LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """One browser-like session: a websocket and the widgets it has seen."""
+
+    def __init__(self, url, rng, think):
+        self.url = url
+        self.rng = rng
+        self.think = think
+        self.widgets = {}
+        self.states = {}
+        self.samples = []
+
+    async def rerun(self, ws, page, action, fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.page_name = page
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+        start = time.perf_counter()
+        await ws.send(msg.SerializeToString())
+        payload, errors = 0, []
+        while True:
+            data = await ws.recv()
+            payload += len(data)
+            reply = ForwardMsg()
+            reply.ParseFromString(data)
+            kind = reply.WhichOneof("type")
+            if kind == "delta" and reply.delta.WhichOneof("type") == "new_element":
+                self.see(reply.delta.new_element, reply.delta.fragment_id, errors)
+            elif kind == "script_finished":
+                break
+        self.samples.append(
+            {
+                "page": page,
+                "action": action,
+                "ms": (time.perf_counter() - start) * 1e3,
+                "payload_kb": payload / 1024,
+                "errors": errors,
+                "time": time.time(),
+            }
+        )
+
+    def see(self, element, fragment_id, errors):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            errors.append(element.exception.message)
+        elif kind in ("selectbox", "slider", "radio"):
+            widget = getattr(element, kind)
+            self.widgets[widget.label] = (widget.id, fragment_id)
+
+    def set_widget(self, kind, label, value):
+        """Widget state for a new value, or None if the page has no such widget."""
+        if label not in self.widgets:
+            return None
+        widget_id, fragment_id = self.widgets[label]
+        state = WidgetState(id=widget_id)
+        if kind == "slider":
+            state.double_array_value.data[:] = [value]
+        else:
+            state.string_value = str(value)
+        self.states[widget_id] = state
+        return fragment_id
+
+    async def pause(self):
+        if self.think > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think))
+
+    async def run(self, deadline):
+        ws_url = re.sub(r"^http", "ws", self.url) + "/_stcore/stream"
+        async with websockets.connect(
+            ws_url, subprotocols=["streamlit"], max_size=None
+        ) as ws:
+            while time.perf_counter() < deadline:
+                page = self.rng.choice(list(WORKLOADS))
+                self.widgets, self.states = {}, {}
+                await self.rerun(ws, page, "open")
+                for kind, label, values in WORKLOADS[page]:
+                    if time.perf_counter() >= deadline:
+                        break
+                    await self.pause()
+                    fragment_id = self.set_widget(kind, label, self.rng.choice(values))
+                    if fragment_id is not None:
+                        await self.rerun(ws, page, label, fragment_id)
+                await self.pause()
+
+
+def rss_mb(pid):
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def server_metrics(url):
+    """Server memory by cache type and cache name, and the active sessions."""
+    with urllib.request.urlopen(url + "/_stcore/metrics", timeout=60) as response:
+        text = response.read().decode("utf-8")
+    memory, sessions = {}, None
+    for line in text.splitlines():
+        if line.startswith("active_sessions "):
+            sessions = int(float(line.split()[1]))
+        match = METRIC_LINE.match(line)
+        if match is None or match.group(1) != "cache_memory_bytes":
+            continue
+        labels = dict(LABEL.findall(match.group(2)))
+        by_name = memory.setdefault(labels.get("cache_type", "?"), {})
+        name = labels.get("cache", "?")
+        by_name[name] = by_name.get(name, 0) + int(float(match.group(3)))
+    return memory, sessions
+
+
+def memory_summary(memory, sessions):
+    """Shared and per-session memory in MB.
+
+    Streamlit does not size st.cache_resource values, so only their entries
+    are counted; the shared objects show up in the process RSS instead.
+    """
+    summary = {
+        "st_cache_data_mb": sum(memory.get("st_cache_data", {}).values()) / 2**20,
+        "st_cache_resource_entries": len(memory.get("st_cache_resource", {})),
+        "st_session_state_mb": (
+            sum(memory.get("st_session_state", {}).values()) / 2**20
+        ),
+    }
+    if sessions:
+        summary["st_session_state_mb_per_session"] = (
+            summary["st_session_state_mb"] / sessions
+        )
+    return summary
+
+
+async def run_level(url, n_sessions, duration, think, pid, seed):
+    deadline = time.perf_counter() + duration
+    sessions = [
+        Session(url, random.Random(seed * 1000 + i), think) for i in range(n_sessions)
+    ]
+    rss = []
+
+    async def sample_rss():
+        while time.perf_counter() < deadline:
+            rss.append(rss_mb(pid))
+            await asyncio.sleep(0.25)
+
+    rss_start = rss_mb(pid)
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(s.run(deadline)) for s in sessions]
+    sampler = asyncio.create_task(sample_rss())
+    # Sessions must still be connected when their state is measured.
+    await asyncio.sleep(max(duration - 1, 0))
+    memory, active = await asyncio.to_thread(server_metrics, url)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    await sampler
+    elapsed = time.perf_counter() - start
+
+    samples = [r for s in sessions for r in s.samples]
+    latencies = sorted(r["ms"] for r in samples)
+    by_page = {}
+    for r in samples:
+        by_page.setdefault(r["page"], []).append(r["ms"])
+    rss = [v for v in rss if v is not None]
+    return {
+        "sessions": n_sessions,
+        "active_sessions": active,
+        "reruns": len(samples),
+        "reruns_per_s": len(samples) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "max_ms": latencies[-1] if latencies else None,
+        "page_p50_ms": {
+            page: statistics.median(values) for page, values in sorted(by_page.items())
+        },
+        "payload_kb_per_rerun": (
+            statistics.mean(r["payload_kb"] for r in samples) if samples else None
+        ),
+        "errors": sorted({e for r in samples for e in r["errors"]}),
+        "session_failures": [repr(r) for r in results if isinstance(r, Exception)],
+        "rss_start_mb": rss_start,
+        "rss_peak_mb": max(rss) if rss else None,
+        "memory_mb": memory_summary(memory, active),
+        "memory_bytes": memory,
+    }
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    index = min(len(values) - 1, round(q / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, timeout=120):
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "streamlit",
+            "run",
+            "main.py",
+            "--server.headless=true",
+            f"--server.port={port}",
+            "--browser.gatherUsageStats=false",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://localhost:{port}"
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/_stcore/health", timeout=5):
+                return proc, url
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("The Streamlit server did not start")
+
+
+async def warm_up(url):
+    """Opens every tab once, so the first level does not pay for cold caches."""
+    session = Session(url, random.Random(0), think=0)
+    ws_url = re.sub(r"^http", "ws", url) + "/_stcore/stream"
+    async with websockets.connect(
+        ws_url, subprotocols=["streamlit"], max_size=None
+    ) as ws:
+        for page in WORKLOADS:
+            await session.rerun(ws, page, "open")
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Running server (default: start one).")
+    parser.add_argument("--pid", type=int, help="Server PID for RSS with --url.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--think", type=float, default=1.0, help="Mean seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-warmup", action="store_true")
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    proc = None
+    url, pid = args.url, args.pid
+    if url is None:
+        proc, url = start_server(free_port())
+        pid = proc.pid
+        logger.info("Started a server at %s (PID %s)", url, pid)
+    url = url.rstrip("/")
+    levels = []
+    try:
+        if not args.no_warmup:
+            asyncio.run(warm_up(url))
+        for n_sessions in args.sessions:
+            logger.info("Running %s sessions for %.0f s", n_sessions, args.duration)
+            level = asyncio.run(
+                run_level(url, n_sessions, args.duration, args.think, pid, args.seed)
+            )
+            levels.append(level)
+            memory = level["memory_mb"]
+            print(
+                f"{n_sessions:>3} sessions | {level['reruns_per_s']:5.1f} reruns/s | "
+                f"p50 {level['p50_ms'] or 0:7.0f} ms | p95 {level['p95_ms'] or 0:7.0f} ms"
+                f" | RSS {level['rss_peak_mb'] or 0:6.0f} MB | "
+                f"cache_data {memory['st_cache_data_mb']:5.1f} MB | "
+                f"cache_resource {memory['st_cache_resource_entries']:3} entries | "
+                f"session_state {memory['st_session_state_mb']:5.2f} MB"
+            )
+            for error in level["errors"] + level["session_failures"]:
+                print(f"    error: {error}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    report = {"url": url, "think_s": args.think, "levels": levels}
+    if len(levels) > 1 and levels[0]["rss_peak_mb"] and levels[-1]["rss_peak_mb"]:
+        extra = levels[-1]["sessions"] - levels[0]["sessions"]
+        growth = levels[-1]["rss_peak_mb"] - levels[0]["rss_peak_mb"]
+        report["rss_mb_per_extra_session"] = growth / extra if extra else None
+        print(f"RSS per extra session: {report['rss_mb_per_extra_session']:.1f} MB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark of the match prediction backends on the same time split.
+
+Train on seasons up to 2022, test on 2023-24. Reports fit time, predict
+latency per 1k games and test accuracy for every backend and feature set.
+
+Run from the repository root:
+    python -m benchmarks.match_backends --repeat 3 --output backends.json
+"""
+
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from analytics.data import load_table
+from analytics.feature_store import PregameFeatureStore
+from analytics.matches import (
+    BACKENDS,
+    FEATURE_OPTS,
+    build_match_frame,
+    make_classifier,
+    split_by_season,
+)
+
+
+def feature_sets():
+    schedule = load_table("games_schedule.csv")
+    ff = load_table("game_four_factors.csv")
+    store = PregameFeatureStore().build(schedule, ff)
+    return {
+        "match": (
+            build_match_frame(schedule, ff),
+            [f + "_diff" for f in FEATURE_OPTS],
+        ),
+        "pregame": (
+            store.match_frame(schedule),
+            [f + "_diff" for f in store.feature_names],
+        ),
+    }
+
+
+def bench(df, feats, backend, max_depth, n_estimators, repeat):
+    X_train, y_train, X_test, y_test = split_by_season(df, feats)
+    fit_times, predict_times = [], []
+    for _ in range(repeat):
+        clf = make_classifier(max_depth, n_estimators, backend=backend)
+        start = time.perf_counter()
+        clf.fit(X_train, y_train)
+        fit_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        clf.predict_proba(X_test)
+        predict_times.append(time.perf_counter() - start)
+    return {
+        "backend": backend,
+        "n_features": len(feats),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "fit_s": min(fit_times),
+        "predict_ms_per_1k": min(predict_times) / len(X_test) * 1e6,
+        "test_acc": clf.score(X_test, y_test),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    rows = []
+    for name, (df, feats) in feature_sets().items():
+        for backend in BACKENDS:
+            result = bench(
+                df, feats, backend, args.max_depth, args.n_estimators, args.repeat
+            )
+            rows.append({"feature_set": name, **result})
+
+    print(pd.DataFrame(rows).to_string(index=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
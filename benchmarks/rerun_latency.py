@@ -0,0 +1,361 @@
+"""Rerun latency of every dashboard tab under scripted widget interactions.
+
+Each tab runs in a fresh interpreter through Streamlit's AppTest harness and
+replays a script of interactions: switching the player, moving the N slider,
+changing K, the model hyperparameters and so on. The first time an interaction
+runs is its cold latency (nothing is cached for the new inputs yet); switching
+back and forth afterwards gives the warm latency. Peak Python memory of an
+interaction is measured with tracemalloc on one more warm replay, so tracing
+does not slow down the timed runs; the RSS growth of the cold run is recorded
+as well. Sections, payload and cache counters come from analytics.perf.
+
+Interactions that start background training (match prediction) wait for the
+job and report the time until the model is shown as settle_ms.
+
+The report is written to <results-dir>/<commit>.json and checked against the
+budgets in benchmarks/rerun_thresholds.json and against the report of a
+baseline commit; the command exits non-zero on a regression.
+
+Run from the repository root:
+    python -m benchmarks.rerun_latency --repeat 3
+    python -m benchmarks.rerun_latency --pages Clustering --baseline 741ebab
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from page_source.navigation import PAGES
+
+RESULTS_DIR = os.environ.get("NBA_BENCH_DIR", os.path.join("benchmarks", "results"))
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "rerun_thresholds.json")
+
+# (interaction name, widget type, label or key, new value, waits for training)
+SCENARIOS = {
+    "Player/Team Stats": [
+        ("switch player", "selectbox", "Select Player:", "LeBron James", False),
+        ("season range", "select_slider", "Выберите сезон:", (2010, 2020), False),
+        ("team view", "radio", "Выберите тип", "Команда", False),
+    ],
+    "Top-N Rankings": [
+        ("move N", "slider", "topn_entity_slider", 10, False),
+        ("switch metric", "selectbox", "Выберите метрику:", "AST", False),
+        ("team view", "radio", "topn_entity", "Команда", False),
+    ],
+    "Time Series Plots": [
+        ("switch player", "selectbox", "ts_player_select", "LeBron James", False),
+        ("normalize", "checkbox", "ts_normalize", True, False),
+        ("team view", "radio", "ts_entity", "Команда", False),
+    ],
+    "Forecast": [
+        ("switch player", "selectbox", "fc_player_select", "LeBron James", False),
+        ("horizon", "number_input", "Количество лет для прогноза:", 5, False),
+        ("team view", "radio", "fc_entity", "Команда", False),
+    ],
+    "Clustering": [
+        ("change K", "slider", "Количество кластеров (K):", 6, False),
+        ("cluster filter", "selectbox", "Фильтр по кластеру:", 1, False),
+    ],
+    "Match prediction": [
+        ("max depth", "slider", "Максимальная глубина дерева:", 8, True),
+        ("trees", "number_input", "Количество деревьев:", 50, True),
+    ],
+    "Sklearn vs Tensorflow": [
+        ("switch player", "selectbox", "Выберите игрока", "LeBron James", False),
+        ("lags", "slider", "Количество лагов (сезонов) в качестве признаков", 2, False),
+        ("trees", "number_input", "Random Forest: количество деревьев", 50, False),
+    ],
+}
+
+SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+from page_source.navigation import lazy_page
+lazy_page({title!r}, {module!r})()
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def find_widget(at, kind, label):
+    """Widget of the given type by key, or else by label."""
+    for widget in getattr(at, kind):
+        if widget.key == label or widget.label == label:
+            return widget
+    raise LookupError(f"No {kind} {label!r} on the page")
+
+
+def wait_for_jobs(at, timeout):
+    """Reruns the page until its background training job has finished."""
+    deadline = time.perf_counter() + timeout
+    job = at.session_state["match_job"] if "match_job" in at.session_state else None
+    while job is not None and not job.done:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Background training did not finish in time")
+        time.sleep(0.1)
+    at.run()
+
+
+class PageRunner:
+    """One AppTest session of a page with timed, perf-recorded reruns."""
+
+    def __init__(self, title, module, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        script = SCRIPT.format(root=os.getcwd(), title=title, module=module)
+        self.at = AppTest.from_string(script, default_timeout=timeout)
+        self.timeout = timeout
+
+    def run(self, action=None, settle=False):
+        """Applies action (or a plain rerun) and returns the timings."""
+        from analytics import perf
+
+        rss_before = perf.rss_bytes()
+        start = time.perf_counter()
+        if action is None:
+            self.at.run()
+        else:
+            action(self.at).run()
+        seconds = time.perf_counter() - start
+        record = perf.records()[-1]
+        result = {
+            "ms": seconds * 1e3,
+            "rss_growth_mb": (perf.rss_bytes() - rss_before) / 2**20,
+            "payload_kb": record["payload_bytes"] / 1024,
+            "sections": {s["name"]: s["seconds"] * 1e3 for s in record["sections"]},
+            "caches": record["caches"],
+            "errors": [str(e.value) for e in self.at.exception],
+        }
+        if settle:
+            wait_for_jobs(self.at, self.timeout)
+            result["settle_ms"] = (time.perf_counter() - start) * 1e3
+        return result
+
+    def peak_mb(self, action=None, settle=False):
+        tracemalloc.start()
+        try:
+            self.run(action, settle)
+            return tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+
+
+def setter(kind, label, value):
+    return lambda at: find_widget(at, kind, label).set_value(value)
+
+
+def measure(runner, name, forward, back, repeat, settle):
+    """Cold run of forward, then warm runs alternating back and forward."""
+    cold = runner.run(forward, settle)
+    warm = []
+    for _ in range(repeat):
+        if back is not None:
+            runner.run(back, settle)
+        warm.append(runner.run(forward, settle))
+    if back is not None:
+        runner.run(back, settle)
+    peak = runner.peak_mb(forward, settle)
+    row = {
+        "interaction": name,
+        "cold_ms": cold["ms"],
+        "warm_ms": statistics.median(r["ms"] for r in warm),
+        "warm_runs_ms": [r["ms"] for r in warm],
+        "peak_mb": peak,
+        "rss_growth_mb": cold["rss_growth_mb"],
+        "payload_kb": cold["payload_kb"],
+        "cold_sections_ms": cold["sections"],
+        "cold_caches": cold["caches"],
+        "errors": sorted({e for r in [cold, *warm] for e in r["errors"]}),
+    }
+    if settle:
+        row["cold_settle_ms"] = cold["settle_ms"]
+        row["warm_settle_ms"] = statistics.median(r["settle_ms"] for r in warm)
+    return row
+
+
+def bench_page(title, repeat, timeout):
+    """Runs the scenario of one page in this process; see run_worker."""
+    module = dict((t, m) for t, m, _ in PAGES)[title]
+    scenario = SCENARIOS.get(title, [])
+    runner = PageRunner(title, module, timeout)
+    trains = any(settle for *_, settle in scenario)
+    rows = [measure(runner, "first run", None, None, repeat, trains)]
+    for name, kind, label, value, settle in scenario:
+        try:
+            previous = find_widget(runner.at, kind, label).value
+        except LookupError as e:
+            rows.append({"interaction": name, "errors": [str(e)]})
+            continue
+        rows.append(
+            measure(
+                runner,
+                name,
+                setter(kind, label, value),
+                setter(kind, label, previous),
+                repeat,
+                settle,
+            )
+        )
+        # The next interaction starts from the new value.
+        runner.run(setter(kind, label, value), settle)
+    return rows
+
+
+def run_worker(title, repeat, timeout, model_dir):
+    """Benchmarks one page in a fresh interpreter, so its caches start cold."""
+    code = (
+        "import json\n"
+        "from benchmarks.rerun_latency import bench_page\n"
+        f"print(json.dumps(bench_page({title!r}, {repeat}, {timeout})))"
+    )
+    env = dict(os.environ, NBA_WARMUP="0", NBA_MODEL_DIR=model_dir)
+    env.pop("NBA_PERF_LOG", None)
+    env.pop("NBA_PROFILE_DIR", None)
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=timeout * 10,
+    )
+    if proc.returncode != 0:
+        return [{"interaction": "first run", "errors": proc.stderr.splitlines()[-1:]}]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_output(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_report(results_dir, commit=None, exclude=None):
+    """Stored report of a commit, or the newest one not of exclude."""
+    if commit is not None:
+        full = git_output("rev-parse", commit) or commit
+        paths = glob.glob(os.path.join(results_dir, f"{full[:12]}*.json"))
+    else:
+        paths = [
+            path
+            for path in glob.glob(os.path.join(results_dir, "*.json"))
+            if not exclude or not os.path.basename(path).startswith(exclude[:12])
+        ]
+    if not paths:
+        return None
+    with open(max(paths, key=os.path.getmtime), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check(report, thresholds, baseline=None):
+    """Budget and baseline violations of a report, as messages."""
+    ratio = thresholds.get("regression_ratio", 1.5)
+    slack = thresholds.get("regression_slack", {})
+    failures = []
+    base_rows = {}
+    if baseline is not None:
+        for title, rows in baseline["pages"].items():
+            for row in rows:
+                base_rows[title, row["interaction"]] = row
+    for title, rows in report["pages"].items():
+        budgets = thresholds.get("pages", {}).get(title, {})
+        for row in rows:
+            name = f"{title} / {row['interaction']}"
+            if row["errors"]:
+                failures.append(f"{name}: {'; '.join(row['errors'])}")
+                continue
+            for metric, limit in budgets.get(row["interaction"], {}).items():
+                if row.get(metric) is not None and row[metric] > limit:
+                    failures.append(
+                        f"{name}: {metric} {row[metric]:.1f} over budget {limit}"
+                    )
+            base = base_rows.get((title, row["interaction"]))
+            if base is None or base.get("errors"):
+                continue
+            for metric, allowed in slack.items():
+                if row.get(metric) is None or base.get(metric) is None:
+                    continue
+                limit = base[metric] * ratio + allowed
+                if row[metric] > limit:
+                    failures.append(
+                        f"{name}: {metric} {row[metric]:.1f} vs "
+                        f"{base[metric]:.1f} at {baseline['commit'][:12]}"
+                    )
+    return failures
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="+", default=[t for t, _, _ in PAGES])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=int, default=600)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    parser.add_argument(
+        "--baseline",
+        help="Commit to compare with (default: the newest stored other commit).",
+    )
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    commit = git_output("rev-parse", "HEAD") or "unknown"
+    report = {
+        "commit": commit,
+        "dirty": bool(git_output("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": args.repeat,
+        "pages": {},
+    }
+    # Models trained during the run go to a scratch registry, so the first
+    # training is really cold and models/ is left untouched.
+    with tempfile.TemporaryDirectory() as model_dir:
+        for title in args.pages:
+            logger.info("Benchmarking %s", title)
+            rows = run_worker(title, args.repeat, args.timeout, model_dir)
+            report["pages"][title] = rows
+            for row in rows:
+                if row["errors"]:
+                    print(f"{title:>22} | {row['interaction']:<15} | error")
+                    continue
+                print(
+                    f"{title:>22} | {row['interaction']:<15} | "
+                    f"cold {row['cold_ms']:8.0f} ms | warm {row['warm_ms']:7.0f} ms"
+                    f" | peak {row['peak_mb']:6.1f} MB"
+                )
+
+    with open(args.thresholds, encoding="utf-8") as f:
+        thresholds = json.load(f)
+    baseline = load_report(args.results_dir, args.baseline, exclude=commit)
+    if args.baseline and baseline is None:
+        logger.warning("No stored results for baseline %s", args.baseline)
+    failures = check(report, thresholds, baseline)
+
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, f"{commit[:12]}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info("Results written to %s", path)
+    if failures:
+        sys.exit("Rerun latency regressions:\n" + "\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Latency benchmark for the local scoring API.
+
+Starts the server on an ephemeral localhost port, sends batches of random
+matchups over a keep-alive connection and reports per-request and per-item
+latency. If the registry is empty a default model is trained first.
+
+Run from the repository root:
+    python -m benchmarks.scoring_api --batch-sizes 1 100 1000 10000
+"""
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+
+import pandas as pd
+
+from analytics.data import frame_fingerprint
+from analytics.matches import FEATURE_OPTS, fit_and_evaluate
+from analytics.model_registry import ModelRegistry, params_key
+from analytics.scoring_api import MatchScorer, load_match_frame, make_server
+
+
+def ensure_model(registry):
+    if registry.latest() is not None:
+        return
+    df = load_match_frame("match")
+    feats = [f + "_diff" for f in FEATURE_OPTS]
+    params = {
+        "feature_set": "match",
+        "backend": "rf",
+        "features": feats,
+        "max_depth": 5,
+        "n_estimators": 100,
+        "data": frame_fingerprint(df),
+    }
+    clf, metrics = fit_and_evaluate(df, feats, 5, 100)
+    registry.save(params_key(params), clf, metrics, params)
+
+
+def random_matchups(scorer, n, seed=0):
+    rng = random.Random(seed)
+    keys = list(scorer.probabilities)
+    return [
+        {"season": int(season), "home": home, "away": away}
+        for season, home, away in rng.choices(keys, k=n)
+    ]
+
+
+def post(conn, path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    conn.request("POST", path, body, {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{response.status}: {data[:200]!r}")
+    return json.loads(data)
+
+
+def bench(conn, scorer, size, repeat):
+    matchups = random_matchups(scorer, size)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scorer.score(matchups)
+    in_process = (time.perf_counter() - start) / repeat
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        post(conn, "/predict", {"matchups": matchups})
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "batch": size,
+        "in_process_us_per_item": in_process / size * 1e6,
+        "http_p50_ms": statistics.median(timings) * 1e3,
+        "http_p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1e3,
+        "http_us_per_item": statistics.median(timings) / size * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[1, 100, 1000, 10000]
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    ensure_model(registry)
+    start = time.perf_counter()
+    scorer = MatchScorer(registry)
+    load_s = time.perf_counter() - start
+
+    server = make_server(scorer, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    try:
+        rows = [bench(conn, scorer, size, args.repeat) for size in args.batch_sizes]
+    finally:
+        conn.close()
+        server.shutdown()
+
+    print(f"Model {scorer.key} loaded in {load_s:.2f}s")
+    print(pd.DataFrame(rows).to_string(index=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"model": scorer.key, "load_s": load_s, "rows": rows}, f, indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
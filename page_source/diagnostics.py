@@ -0,0 +1,119 @@
+def app():
+    import os
+
+    import pandas as pd
+    import streamlit as st
+    from analytics import perf, startup
+    from analytics.cache import named_caches
+    from analytics.data import DASHBOARD_TABLES, load_table
+    from analytics.panel import PANEL_TABLES, load_panel
+
+    st.header("Диагностика производительности")
+    st.markdown(
+        "Замеры перезапусков страниц этого процесса: время секций, строки, "
+        "объём отправленных в браузер данных, попадания в кэши и память. "
+        f"JSON-лог: `{perf.PERF_LOG or 'NBA_PERF_LOG не задан'}`, "
+        f"профили cProfile: `{perf.PROFILE_DIR or 'NBA_PROFILE_DIR не задан'}`."
+    )
+
+    records = perf.records()
+    if not records:
+        st.info("Пока нет замеров — откройте страницы дашборда.")
+    else:
+        reruns = pd.DataFrame(
+            {
+                "Время": pd.to_datetime([r["time"] for r in records], unit="s"),
+                "Страница": [r["page"] for r in records],
+                "Тип": [r["kind"] for r in records],
+                "мс": [r["seconds"] * 1e3 for r in records],
+                "Данные, КБ": [r["payload_bytes"] / 1024 for r in records],
+                "RSS, МБ": [r["rss_bytes"] / 2**20 for r in records],
+            }
+        )
+        st.subheader("Время перезапуска по страницам")
+        by_page = reruns.groupby(["Страница", "Тип"])["мс"]
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Перезапусков": by_page.size(),
+                    "p50, мс": by_page.median(),
+                    "p95, мс": by_page.quantile(0.95),
+                    "Макс, мс": by_page.max(),
+                }
+            ).round(1)
+        )
+
+        st.subheader("Последние перезапуски")
+        st.dataframe(reruns.iloc[::-1].round(1), hide_index=True)
+        choice = st.selectbox(
+            "Секции перезапуска:",
+            range(len(records) - 1, -1, -1),
+            format_func=lambda i: (
+                f"{reruns['Время'].iloc[i]:%H:%M:%S} — {records[i]['page']} "
+                f"({records[i]['seconds'] * 1e3:.0f} мс)"
+            ),
+            key="perf_rerun",
+        )
+        record = records[choice]
+        sections = pd.DataFrame(
+            record["sections"], columns=list(perf.Section("").as_dict())
+        )
+        sections["ms"] = sections.pop("seconds") * 1e3
+        st.dataframe(sections.round(1), hide_index=True)
+        if record["caches"]:
+            st.dataframe(pd.DataFrame(record["caches"]).T)
+            st.caption(
+                "Попадания и промахи — разница счётчиков всего процесса за время "
+                "перезапуска: при нескольких сессиях сюда входят и их обращения."
+            )
+
+    st.subheader("Кэши")
+    caches = {name: cache.stats() for name, cache in named_caches().items()}
+    for function in [load_table, load_panel]:
+        info = function.cache_info()
+        caches[function.__name__] = {
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hits": info.hits,
+            "misses": info.misses,
+        }
+    st.dataframe(pd.DataFrame(caches).T)
+
+    streamlit_caches = perf.streamlit_caches()
+    if streamlit_caches:
+        st.markdown(
+            "Кэши Streamlit: записи `st.cache_data` и `st.cache_resource` общие для "
+            "всех сессий, `st_session_state` — своё у каждой сессии. Streamlit не "
+            "считает попадания в эти кэши и не измеряет размер `st.cache_resource`."
+        )
+        table = pd.DataFrame(streamlit_caches).T
+        table["МБ"] = table.pop("bytes").astype(float) / 2**20
+        st.dataframe(table.sort_values(["type", "МБ"]).round(2))
+
+    if st.button("Посчитать память наборов данных", key="perf_memory"):
+        rows = []
+        for name in DASHBOARD_TABLES:
+            df = load_table(name)
+            rows.append(
+                {
+                    "Набор": name,
+                    "Строк": len(df),
+                    "МБ": df.memory_usage(deep=True).sum() / 2**20,
+                }
+            )
+        for name in PANEL_TABLES:
+            panel = load_panel(name)
+            rows.append(
+                {
+                    "Набор": f"панель {name}",
+                    "Строк": len(panel.entities) * len(panel.seasons),
+                    "МБ": panel.values.nbytes / 2**20,
+                }
+            )
+        st.dataframe(pd.DataFrame(rows).round(2), hide_index=True)
+        st.caption(
+            f"RSS процесса: {perf.rss_bytes() / 2**20:.0f} МБ, PID {os.getpid()}"
+        )
+
+    with st.expander("Профиль запуска"):
+        st.json(startup.startup_profile())
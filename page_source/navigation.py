@@ -0,0 +1,31 @@
+import importlib
+import time
+
+from analytics import perf, startup
+
+PAGES = [
+    ("Player/Team Stats", "page_source.page1", "stats"),
+    ("Top-N Rankings", "page_source.page2", "top-n"),
+    ("Time Series Plots", "page_source.page3", "time-series"),
+    ("Forecast", "page_source.page8", "forecast"),
+    ("Clustering", "page_source.page7", "clustering"),
+    ("Match prediction", "page_source.page4", "match-prediction"),
+    ("Sklearn vs Tensorflow", "page_source.page9", "sklearn-vs-tensorflow"),
+]
+
+
+def lazy_page(title, module_name):
+    """Imports the page module only when the page is actually opened."""
+
+    def run():
+        start = time.perf_counter()
+        with perf.rerun(title):
+            startup.timed_import(module_name).app()
+        startup.record_first_paint(title, time.perf_counter() - start)
+
+    return run
+
+
+def diagnostics_page():
+    """Hidden page with the performance records of this process."""
+    importlib.import_module("page_source.diagnostics").app()
@@ -2,14 +2,36 @@ def app():
     import pandas as pd
     import streamlit as st
     import altair as alt
+    from analytics import perf
+    from analytics.data import load_table
+    from analytics.metrics import DERIVED_METRICS, metrics_for
+    from analytics.distributions import (
+        boxplot_chart,
+        five_number_summary,
+        histogram,
+        histogram_chart,
+    )
+    from page_source.sections import fragment, lazy_section
 
-    @st.cache_data
+    @st.cache_resource
     def load_data():
-        player_totals = pd.read_csv("data/nba_player_totals_2000-2024.csv")
-        team_standings = pd.read_csv("data/nba_team_standings_2000-2024.csv")
+        player_totals = load_table("nba_player_totals_2000-2024.csv")
+        team_standings = load_table("nba_team_standings_2000-2024.csv")
         return player_totals, team_standings
 
-    player_totals, team_standings = load_data()
+    @st.cache_data
+    def distribution(entity, metric, start_year, end_year):
+        player_totals, team_standings = load_data()
+        source = player_totals if entity == "player" else team_standings
+        df = source[
+            (source["SeasonEndYear"] >= start_year)
+            & (source["SeasonEndYear"] <= end_year)
+        ]
+        return histogram(df[metric]), five_number_summary(df, "SeasonEndYear", metric)
+
+    with perf.section("load_data") as section:
+        player_totals, team_standings = load_data()
+        section.rows = len(player_totals) + len(team_standings)
     st.header("Топ-N игроков / команд по метрике")
 
     player_metric_desc = {
@@ -30,6 +52,8 @@ def app():
         "FT%": "Процент попаданий штрафных",
         "eFG%": "Эффективный процент попаданий с игры",
     }
+    for name in metrics_for("nba_player_totals_2000-2024.csv"):
+        player_metric_desc[name] = DERIVED_METRICS[name].description
     team_metric_desc = {
         "W": "Всего побед",
         "L": "Всего поражений",
@@ -39,6 +63,8 @@ def app():
         "SRS": "Простая рейтинговая система (атака - защита + сила расписания)",
         "GB": "Отставание от первого места (в играх)",
     }
+    for name in metrics_for("nba_team_standings_2000-2024.csv"):
+        team_metric_desc[name] = DERIVED_METRICS[name].description
 
     entity = st.radio("Выберите тип:", ["Игрок", "Команда"], key="topn_entity")
     years = sorted(player_totals["SeasonEndYear"].unique())
@@ -48,72 +74,43 @@ def app():
         value=(years[0], years[-1]),
         key="topn_entity_year_slider",
     )
-    N = st.slider(
-        "Выберите N (количество записей):",
-        min_value=1,
-        max_value=20,
-        value=5,
-        key="topn_entity_slider",
-    )
 
-    if entity == "Игрок":
-        metric = st.selectbox(
-            "Выберите метрику:",
-            list(player_metric_desc.keys()),
-            key="topn_player_metric",
+    # The top-N block is a fragment: moving the N slider reruns only this block,
+    # not the metric distributions below it.
+    @fragment("Top-N Rankings: top-N")
+    def top_n_section(df, id_col, noun, metric, agg):
+        N = st.slider(
+            "Выберите N (количество записей):",
+            min_value=1,
+            max_value=20,
+            value=5,
+            key="topn_entity_slider",
         )
-        st.markdown(f"**Описание метрики:** {player_metric_desc[metric]}")
-
-        df = player_totals[
-            (player_totals["SeasonEndYear"] >= start_year)
-            & (player_totals["SeasonEndYear"] <= end_year)
-        ]
-        agg = "mean" if metric.endswith("%") else "sum"
-        df_group = df.groupby("Player")[metric].agg(agg).reset_index()
+        df_group = df.groupby(id_col)[metric].agg(agg).reset_index()
         df_group = df_group.sort_values(by=metric, ascending=False).head(N)
 
-        st.subheader(f"Топ {N} игроков по метрике {metric} ({start_year}-{end_year})")
+        st.subheader(f"Топ {N} {noun} по метрике {metric} ({start_year}-{end_year})")
         st.dataframe(df_group)
-        st.bar_chart(df_group.set_index("Player")[metric])
-
-        st.subheader(f"Распределение {metric} среди всех игроков")
-        hist = (
-            alt.Chart(df)
-            .mark_bar()
-            .encode(
-                alt.X(f"{metric}:Q", bin=True, title=metric),
-                alt.Y("count()", title="Количество"),
-            )
-            .properties(width=700, height=300)
-        )
-        st.altair_chart(hist, use_container_width=True)
+        st.bar_chart(df_group.set_index(id_col)[metric])
 
-        st.subheader(f"Тренды по сезонам для топ-{N} игроков ({metric})")
-        df_trend = df[df["Player"].isin(df_group["Player"])]
+        st.subheader(f"Тренды по сезонам для топ-{N} {noun} ({metric})")
+        df_trend = df[df[id_col].isin(df_group[id_col])]
         df_trend = (
-            df_trend.groupby(["SeasonEndYear", "Player"])[metric].agg(agg).reset_index()
+            df_trend.groupby(["SeasonEndYear", id_col])[metric].agg(agg).reset_index()
         )
-        pivot = df_trend.pivot(index="SeasonEndYear", columns="Player", values=metric)
+        pivot = df_trend.pivot(index="SeasonEndYear", columns=id_col, values=metric)
         st.line_chart(pivot)
 
-        st.subheader("Среднее за игру для топ-игроков")
-        df_games = df.groupby("Player")["G"].sum().reset_index()
-        df_metric = df.groupby("Player")[metric].agg(agg).reset_index()
-        df_pg_metric = pd.merge(df_metric, df_games, on="Player")
-        df_pg_metric["Per_Game"] = df_pg_metric[metric] / df_pg_metric["G"]
-        df_pg_metric = df_pg_metric[df_pg_metric["Player"].isin(df_group["Player"])]
-        st.bar_chart(df_pg_metric.set_index("Player")["Per_Game"])
-
-        st.subheader("Распределение метрики по сезонам (ящик с усами)")
-        box = (
-            alt.Chart(df)
-            .mark_boxplot()
-            .encode(x="SeasonEndYear:O", y=f"{metric}:Q")
-            .properties(width=700, height=300)
-        )
-        st.altair_chart(box, use_container_width=True)
+        if id_col == "Player":
+            st.subheader("Среднее за игру для топ-игроков")
+            df_games = df.groupby("Player")["G"].sum().reset_index()
+            df_metric = df.groupby("Player")[metric].agg(agg).reset_index()
+            df_pg_metric = pd.merge(df_metric, df_games, on="Player")
+            df_pg_metric["Per_Game"] = df_pg_metric[metric] / df_pg_metric["G"]
+            df_pg_metric = df_pg_metric[df_pg_metric["Player"].isin(df_group["Player"])]
+            st.bar_chart(df_pg_metric.set_index("Player")["Per_Game"])
 
-        st.subheader("Суммарный вклад топ-игроков")
+        st.subheader(f"Суммарный вклад топ-{noun}")
         df_group["Pct"] = df_group[metric] / df_group[metric].sum()
         df_group = df_group.sort_values(by="Pct", ascending=False)
         df_group["Cumulative"] = df_group["Pct"].cumsum()
@@ -121,7 +118,7 @@ def app():
             alt.Chart(df_group)
             .mark_line(point=True)
             .encode(
-                x=alt.X("Player:N", sort=None),
+                x=alt.X(f"{id_col}:N", sort=None),
                 y=alt.Y("Cumulative:Q", title="Накопительный %"),
             )
         )
@@ -129,78 +126,18 @@ def app():
             alt.Chart(df_group)
             .mark_bar()
             .encode(
-                x=alt.X("Player:N", sort=None), y=alt.Y(f"{metric}:Q", title=metric)
+                x=alt.X(f"{id_col}:N", sort=None), y=alt.Y(f"{metric}:Q", title=metric)
             )
         )
         st.altair_chart(cum_bar + cum_line, use_container_width=True)
 
-    else:
-        metric = st.selectbox(
-            "Выберите метрику:", list(team_metric_desc.keys()), key="topn_team_metric"
+    def season_boxplot(entity_type, metric):
+        _, summary = distribution(entity_type, metric, start_year, end_year)
+        st.altair_chart(
+            boxplot_chart(summary, "SeasonEndYear", metric), use_container_width=True
         )
-        st.markdown(f"**Описание метрики:** {team_metric_desc[metric]}")
-
-        df = team_standings[
-            (team_standings["SeasonEndYear"] >= start_year)
-            & (team_standings["SeasonEndYear"] <= end_year)
-        ]
-        agg = "sum" if metric in ["W", "L", "GB"] else "mean"
-        df_group = df.groupby("Team")[metric].agg(agg).reset_index()
-        df_group = df_group.sort_values(by=metric, ascending=False).head(N)
-
-        st.subheader(f"Топ {N} команд по метрике {metric} ({start_year}-{end_year})")
-        st.dataframe(df_group)
-        st.bar_chart(df_group.set_index("Team")[metric])
-
-        st.subheader(f"Распределение {metric} среди всех команд")
-        hist = (
-            alt.Chart(df)
-            .mark_bar()
-            .encode(
-                alt.X(f"{metric}:Q", bin=True, title=metric),
-                alt.Y("count()", title="Количество"),
-            )
-            .properties(width=700, height=300)
-        )
-        st.altair_chart(hist, use_container_width=True)
-
-        st.subheader(f"Тренды по сезонам для топ-{N} команд ({metric})")
-        df_trend = df[df["Team"].isin(df_group["Team"])]
-        df_trend = (
-            df_trend.groupby(["SeasonEndYear", "Team"])[metric].agg(agg).reset_index()
-        )
-        pivot = df_trend.pivot(index="SeasonEndYear", columns="Team", values=metric)
-        st.line_chart(pivot)
 
-        st.subheader("Распределение метрики по сезонам (ящик с усами)")
-        box = (
-            alt.Chart(df)
-            .mark_boxplot()
-            .encode(x="SeasonEndYear:O", y=f"{metric}:Q")
-            .properties(width=700, height=300)
-        )
-        st.altair_chart(box, use_container_width=True)
-
-        st.subheader("Суммарный вклад топ-команд")
-        df_group["Pct"] = df_group[metric] / df_group[metric].sum()
-        df_group = df_group.sort_values(by="Pct", ascending=False)
-        df_group["Cumulative"] = df_group["Pct"].cumsum()
-        cum_line = (
-            alt.Chart(df_group)
-            .mark_line(point=True)
-            .encode(
-                x=alt.X("Team:N", sort=None),
-                y=alt.Y("Cumulative:Q", title="Накопительный %"),
-            )
-        )
-        cum_bar = (
-            alt.Chart(df_group)
-            .mark_bar()
-            .encode(x=alt.X("Team:N", sort=None), y=alt.Y(f"{metric}:Q", title=metric))
-        )
-        st.altair_chart(cum_bar + cum_line, use_container_width=True)
-
-        st.subheader("Тепловая карта метрики по сезонам и командам")
+    def season_heatmap(df, metric, agg):
         df_heat = df.groupby(["SeasonEndYear", "Team"])[metric].agg(agg).reset_index()
         heat = (
             alt.Chart(df_heat)
@@ -213,3 +150,70 @@ def app():
             .properties(width=700, height=400)
         )
         st.altair_chart(heat, use_container_width=True)
+
+    if entity == "Игрок":
+        metric = st.selectbox(
+            "Выберите метрику:",
+            list(player_metric_desc.keys()),
+            key="topn_player_metric",
+        )
+        st.markdown(f"**Описание метрики:** {player_metric_desc[metric]}")
+
+        with perf.section("filter") as section:
+            df = player_totals[
+                (player_totals["SeasonEndYear"] >= start_year)
+                & (player_totals["SeasonEndYear"] <= end_year)
+            ]
+            if metric in DERIVED_METRICS:
+                agg = DERIVED_METRICS[metric].agg
+            else:
+                agg = "mean" if metric.endswith("%") else "sum"
+            section.rows = len(df)
+        top_n_section(df, "Player", "игроков", metric, agg)
+
+        with perf.section("charts"):
+            st.subheader(f"Распределение {metric} среди всех игроков")
+            bins, _ = distribution("player", metric, start_year, end_year)
+            st.altair_chart(histogram_chart(bins, metric), use_container_width=True)
+        lazy_section(
+            "Распределение метрики по сезонам (ящик с усами)",
+            "topn_player_boxplot",
+            season_boxplot,
+            "player",
+            metric,
+        )
+
+    else:
+        metric = st.selectbox(
+            "Выберите метрику:", list(team_metric_desc.keys()), key="topn_team_metric"
+        )
+        st.markdown(f"**Описание метрики:** {team_metric_desc[metric]}")
+
+        with perf.section("filter") as section:
+            df = team_standings[
+                (team_standings["SeasonEndYear"] >= start_year)
+                & (team_standings["SeasonEndYear"] <= end_year)
+            ]
+            agg = "sum" if metric in ["W", "L", "GB"] else "mean"
+            section.rows = len(df)
+        top_n_section(df, "Team", "команд", metric, agg)
+
+        with perf.section("charts"):
+            st.subheader(f"Распределение {metric} среди всех команд")
+            bins, _ = distribution("team", metric, start_year, end_year)
+            st.altair_chart(histogram_chart(bins, metric), use_container_width=True)
+        lazy_section(
+            "Распределение метрики по сезонам (ящик с усами)",
+            "topn_team_boxplot",
+            season_boxplot,
+            "team",
+            metric,
+        )
+        lazy_section(
+            "Тепловая карта метрики по сезонам и командам",
+            "topn_team_heatmap",
+            season_heatmap,
+            df,
+            metric,
+            agg,
+        )
@@ -1,50 +1,107 @@
 def app():
     import pandas as pd
     import streamlit as st
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.model_selection import cross_val_score
-    from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
+    import numpy as np
     import altair as alt
+    from analytics import perf
+    from analytics.data import frame_fingerprint, load_table
+    from analytics.matches import (
+        BACKENDS,
+        FEATURE_OPTS,
+        build_match_frame,
+        fit_and_evaluate,
+        split_by_season,
+    )
+    from analytics.jobs import JobRunner
+    from analytics.feature_store import feature_names as pregame_feature_names
+    from analytics.feature_store import load_or_build
+    from analytics.matchups import (
+        base_features,
+        probability_table,
+        team_season_vectors,
+    )
+    from analytics.model_registry import ModelRegistry, params_key
+    from analytics.sweep import grid_configs, random_configs, run_sweep
 
     st.header("4. Прогноз исхода матча 📈")
     st.markdown(
-        "Мы обучаем Random Forest на показателях 'Four Factors' команд, чтобы предсказать победу хозяев. "
+        "Мы обучаем Random Forest (или Histogram Gradient Boosting) на показателях 'Four Factors' команд, чтобы предсказать победу хозяев. "
         "Признаки — это разница (хозяева - гости) по следующим метрикам: Pace, eFG%, TOV%, ORB%, FT/FGA и ORtg."
     )
 
     st.sidebar.header("Гиперпараметры")
     st.sidebar.markdown("Для предсказания исхода матча")
+    backend = st.sidebar.selectbox(
+        "Модель:", list(BACKENDS), format_func=BACKENDS.get, key="match_backend"
+    )
     max_depth = st.sidebar.slider("Максимальная глубина дерева:", 1, 20, 5)
-    feature_opts = ["Pace", "eFG_Pct", "TOV_Pct", "ORB_Pct", "FT_per_FGA"]
+    feature_set = st.sidebar.radio(
+        "Набор признаков:",
+        ["Four factors матча", "До-матчевая форма"],
+        key="match_feature_set",
+    )
+    pregame = feature_set == "До-матчевая форма"
+    feature_opts = pregame_feature_names() if pregame else FEATURE_OPTS
     selected = st.sidebar.multiselect(
-        "Выберите признаки:", feature_opts, default=feature_opts
+        "Выберите признаки:",
+        feature_opts,
+        default=feature_opts,
+        key=f"match_features_{int(pregame)}",
     )
     n_estimators = st.sidebar.number_input("Количество деревьев:", 10, 200, 100, 10)
 
-    schedule = pd.read_csv("data/games_schedule.csv")
-    ff = pd.read_csv("data/game_four_factors.csv")
-    ff_home = ff.rename(columns={c: f"home_{c}" for c in feature_opts})
-    ff_away = ff.rename(columns={c: f"away_{c}" for c in feature_opts})
-    df = schedule.merge(
-        ff_home[["Game_ID", "Team_ID"] + [f"home_{c}" for c in feature_opts]],
-        left_on=["Game_ID", "Home_Team_ID"],
-        right_on=["Game_ID", "Team_ID"],
-    ).drop(columns=["Team_ID"])
-    df = df.merge(
-        ff_away[["Game_ID", "Team_ID"] + [f"away_{c}" for c in feature_opts]],
-        left_on=["Game_ID", "Visitor_Team_ID"],
-        right_on=["Game_ID", "Team_ID"],
-    ).drop(columns=["Team_ID"])
-
-    for feat in feature_opts:
-        df[f"{feat}_diff"] = df[f"home_{feat}"] - df[f"away_{feat}"]
-    feats = [f + "_diff" for f in selected]
-
-    train_mask = df["Season_End_Year"] <= 2022
-    X_train = df.loc[train_mask, feats]
-    y_train = df.loc[train_mask, "Home_Win"]
-    X_test = df.loc[~train_mask, feats]
-    y_test = df.loc[~train_mask, "Home_Win"]
+    # One shared, read-only match frame per feature set for all sessions.
+    @st.cache_resource
+    def load_matches(pregame):
+        schedule = load_table("games_schedule.csv")
+        ff = load_table("game_four_factors.csv")
+        if pregame:
+            df = load_or_build(schedule, ff).match_frame(schedule)
+        else:
+            df = build_match_frame(schedule, ff)
+        return df, frame_fingerprint(df)
+
+    @st.cache_resource
+    def get_registry():
+        return ModelRegistry()
+
+    @st.cache_resource
+    def get_runner():
+        return JobRunner(max_workers=2)
+
+    def train(job, feats, params):
+        clf, metrics = fit_and_evaluate(
+            df,
+            feats,
+            params["max_depth"],
+            params["n_estimators"],
+            progress=job.report,
+            backend=params["backend"],
+        )
+        return get_registry().save(job.key, clf, metrics, params)
+
+    @st.cache_data
+    def matchup_table(model_key, _clf, feats):
+        home_vecs, away_vecs = team_season_vectors(df, base_features(feats))
+        return probability_table(_clf, home_vecs, away_vecs, feats)
+
+    def sweep(job, configs, params):
+        results = run_sweep(df, configs, progress=job.report, backend=params["backend"])
+        get_registry().save_sweep(results, params)
+        return results
+
+    @st.fragment(run_every=0.5)
+    def job_progress(state_key, text):
+        job = st.session_state[state_key]
+        if job.done:
+            st.rerun()
+        st.progress(job.progress, text=job.message or text)
+
+    with perf.section("load_data") as section:
+        df, fingerprint = load_matches(pregame)
+        feats = [f + "_diff" for f in selected]
+        _, y_train, _, _ = split_by_season(df, feats)
+        section.rows = len(df)
 
     st.subheader("Распределение классов в обучающей выборке")
     train_counts = y_train.value_counts().reset_index()
@@ -61,15 +118,41 @@ def app():
     )
     st.altair_chart(dist_chart)
 
-    clf = RandomForestClassifier(
-        n_estimators=int(n_estimators), max_depth=int(max_depth), random_state=42
-    )
-    clf.fit(X_train, y_train)
-    y_train_pred = clf.predict(X_train)
-    y_pred = clf.predict(X_test)
-    train_acc = accuracy_score(y_train, y_train_pred)
-    test_acc = accuracy_score(y_test, y_pred)
-    cv_scores = cross_val_score(clf, X_train, y_train, cv=5)
+    registry = get_registry()
+    params = {
+        "feature_set": "pregame" if pregame else "match",
+        "backend": backend,
+        "features": feats,
+        "max_depth": int(max_depth),
+        "n_estimators": int(n_estimators),
+        "data": fingerprint,
+    }
+    key = params_key(params)
+    with perf.section("model_lookup"):
+        entry = registry.load(key)
+    # Training runs on a background thread shared by sessions with the same
+    # hyperparameters; a session releases its job when they change, and the
+    # job is cancelled once no session waits for it.
+    job = st.session_state.get("match_job")
+    if job is not None and job.key != key:
+        job.release()
+        del st.session_state["match_job"]
+        job = None
+    if entry is None:
+        if job is None or job.cancelled:
+            job = get_runner().submit(key, lambda job: train(job, feats, params))
+            st.session_state["match_job"] = job
+        if not job.done:
+            st.subheader("Результаты модели")
+            job_progress("match_job", "Обучение модели...")
+            return
+        if job.error is not None:
+            st.error(f"Не удалось обучить модель: {job.error}")
+            return
+        entry = job.result
+    clf, metrics = entry["model"], entry["metrics"]
+    train_acc, test_acc = metrics["train_acc"], metrics["test_acc"]
+    cv_scores = np.asarray(metrics["cv_scores"])
 
     st.subheader("Результаты модели")
     st.write(f"Accuracy: **{train_acc:.2%}**")
@@ -82,7 +165,7 @@ def app():
         )
 
     st.subheader("Confusion matrix (test)")
-    cm = confusion_matrix(y_test, y_pred)
+    cm = metrics["confusion_matrix"]
     cm_df = (
         pd.DataFrame(
             cm,
@@ -101,12 +184,13 @@ def app():
     st.altair_chart(cm_chart)
 
     st.subheader("Отчет классификации (test)")
-    report = classification_report(y_test, y_pred, output_dict=True)
-    rpt_df = pd.DataFrame(report).transpose()
+    rpt_df = pd.DataFrame(metrics["classification_report"]).transpose()
     st.dataframe(rpt_df)
 
     st.subheader("Важность признаков")
-    imp = pd.DataFrame({"Признак": feats, "Важность": clf.feature_importances_})
+    imp = pd.DataFrame(
+        {"Признак": feats, "Важность": [metrics["importances"][f] for f in feats]}
+    )
     imp = imp.sort_values("Важность", ascending=False)
     imp_chart = (
         alt.Chart(imp)
@@ -116,22 +200,116 @@ def app():
     )
     st.altair_chart(imp_chart)
 
+    st.subheader("Перебор гиперпараметров")
+    with st.expander("Параметры перебора"):
+        with st.form("sweep_form"):
+            sweep_depths = st.multiselect(
+                "Максимальная глубина:", [2, 3, 5, 8, 12, 16, 20], default=[3, 5, 8]
+            )
+            sweep_trees = st.multiselect(
+                "Количество деревьев:",
+                [10, 25, 50, 100, 150, 200],
+                default=[25, 50, 100, 200],
+            )
+            subsets_mode = st.radio(
+                "Наборы признаков:",
+                ["Текущий выбор", "Текущий выбор и варианты без одного признака"],
+            )
+            search = st.radio("Стратегия:", ["Полный перебор", "Случайный поиск"])
+            n_iter = st.number_input(
+                "Число конфигураций (случайный поиск):", 5, 500, 30, 5
+            )
+            submitted = st.form_submit_button("Запустить перебор")
+
+    sweep_params = {
+        "feature_set": "pregame" if pregame else "match",
+        "backend": backend,
+        "data": fingerprint,
+    }
+    if submitted and sweep_depths and sweep_trees:
+        subsets = [feats]
+        if subsets_mode != "Текущий выбор" and len(feats) > 1:
+            subsets += [[f for f in feats if f != drop] for drop in feats]
+        if search == "Полный перебор":
+            configs = grid_configs(sweep_depths, sweep_trees, subsets)
+        else:
+            configs = random_configs(sweep_depths, sweep_trees, subsets, n_iter)
+        old_job = st.session_state.get("sweep_job")
+        if old_job is not None:
+            old_job.release()
+        st.session_state["sweep_job"] = get_runner().submit(
+            "sweep-" + params_key({"configs": configs, **sweep_params}),
+            lambda job: sweep(job, configs, sweep_params),
+        )
+
+    sweep_job = st.session_state.get("sweep_job")
+    if sweep_job is not None and not sweep_job.done:
+        job_progress("sweep_job", "Перебор конфигураций...")
+    elif sweep_job is not None and sweep_job.error is not None:
+        st.error(f"Перебор завершился с ошибкой: {sweep_job.error}")
+
+    sweeps = get_registry().load_sweeps()
+    if not sweeps.empty:
+        sweeps = sweeps[
+            (sweeps["data"] == fingerprint)
+            & (sweeps["feature_set"] == sweep_params["feature_set"])
+            & (sweeps.get("backend", "rf") == backend)
+        ]
+    if sweeps.empty:
+        st.info("Результатов перебора для текущих данных пока нет.")
+    else:
+        last = sweeps[sweeps["sweep_id"] == sweeps["sweep_id"].iloc[-1]]
+        st.caption(
+            f"Последний перебор: {last['created'].iloc[0]}, {len(last)} конфигураций"
+        )
+        st.dataframe(
+            last[
+                [
+                    "features",
+                    "max_depth",
+                    "n_estimators",
+                    "cv_mean",
+                    "cv_std",
+                    "test_acc",
+                    "train_acc",
+                    "fit_time_s",
+                ]
+            ].sort_values(["cv_mean", "test_acc"], ascending=False),
+            hide_index=True,
+        )
+
     st.subheader("Симуляция матча")
     season = st.selectbox("Сезон:", sorted(df["Season_End_Year"].unique()))
     teams = sorted(df["Home_Team_ID"].unique())
     home = st.selectbox("Хозяева:", teams)
     away = st.selectbox("Гости:", teams)
+    probs = matchup_table(key, clf, feats)
     if st.button("Спрогнозировать победу хозяев"):
-        hist = df[df["Season_End_Year"] == season]
-        home_avg = hist[hist["Home_Team_ID"] == home][
-            [f"home_{f}" for f in feature_opts]
-        ].mean()
-        away_avg = hist[hist["Visitor_Team_ID"] == away][
-            [f"away_{f}" for f in feature_opts]
-        ].mean()
-        diff = (home_avg.values - away_avg.values).reshape(1, -1)
-        prob = clf.predict_proba(diff)[0][1]
-        st.write(f"Вероятность победы {home}: **{prob:.1%}**")
+        if (season, home, away) in probs.index:
+            prob = probs.loc[(season, home, away)]
+            st.write(f"Вероятность победы {home}: **{prob:.1%}**")
+        else:
+            st.warning(f"Нет данных по {home} или {away} в сезоне {season}.")
+
+    st.subheader(f"Матрица вероятностей победы хозяев ({season})")
+    if season in probs.index.get_level_values("Season"):
+        heat_df = probs.loc[season].reset_index()
+        heat = (
+            alt.Chart(heat_df)
+            .mark_rect()
+            .encode(
+                x=alt.X("Away:N", title="Гости"),
+                y=alt.Y("Home:N", title="Хозяева"),
+                color=alt.Color(
+                    "Home_Win_Prob:Q",
+                    title="P(победа хозяев)",
+                    scale=alt.Scale(scheme="redblue", domain=[0, 1]),
+                ),
+                tooltip=["Home", "Away", alt.Tooltip("Home_Win_Prob:Q", format=".1%")],
+            )
+            .properties(width=700, height=600)
+        )
+        st.altair_chart(heat, use_container_width=True)
 
     st.markdown("---")
     st.subheader("Объяснение признаков")
@@ -141,3 +319,9 @@ def app():
     st.markdown("- ORB_Pct_diff: разница в проценте подборов в нападении")
     st.markdown("- FT_per_FGA_diff: разница штрафных на бросок с игры")
     st.markdown("- ORtg_diff: разница в атакующем рейтинге (очки на 100 владений)")
+    st.markdown(
+        "В режиме «До-матчевая форма» те же показатели (и доля побед) берутся "
+        "только по играм до даты матча: среднее за последние 10 игр (`_last10`) "
+        "и с начала сезона (`_season`), а также дни отдыха (`Rest_Days`), "
+        "игра второй день подряд (`B2B`) и число сыгранных игр."
+    )
@@ -1,122 +1,324 @@
 def app():
     import streamlit as st
     import pandas as pd
-    from sklearn.cluster import KMeans
-    from sklearn.preprocessing import StandardScaler
-    from sklearn.decomposition import PCA
     import altair as alt
+    from analytics import perf
+    from analytics.clustering import (
+        K_RANGE,
+        IncrementalClusterer,
+        fit_kmeans,
+        k_sweep,
+        pca_projection,
+    )
+    from analytics.data import frame_fingerprint, load_table
+    from analytics.metrics import metrics_for
+    from analytics.similarity import SimilarityIndex
+    from page_source.sections import fragment, lazy_section
 
-    @st.cache_data
+    @st.cache_resource
     def load_data():
-        per_game = pd.read_csv("data/parsed_player_per_game_stats.csv")
-        team_misc = pd.read_csv("data/parsed_team_misc_stats.csv")
-        return per_game, team_misc
+        per_game = load_table("parsed_player_per_game_stats.csv")
+        team_misc = load_table("parsed_team_misc_stats.csv")
+        fingerprint = frame_fingerprint(per_game) + frame_fingerprint(team_misc)
+        return per_game, team_misc, fingerprint
+
+    with perf.section("load_data") as section:
+        per_game, team_misc, fingerprint = load_data()
+        section.rows = len(per_game) + len(team_misc)
+    # Row-level scatter plots are sampled to keep the chart payload bounded.
+    scatter_points = 5000
+
+    # Every fit is keyed on (entity, stats, K, data fingerprint): changing the
+    # cluster filter or revisiting a K reruns the page without refitting.
+    @st.cache_data
+    def cluster_input(entity, stats, fingerprint):
+        if entity == "Игрок":
+            return per_game.groupby("Player_Name_Stats")[list(stats)].mean().dropna()
+        return team_misc.groupby("Tm_ID")[list(stats)].mean().dropna()
+
+    @st.cache_data
+    def clustering(entity, stats, n_clusters, fingerprint):
+        return fit_kmeans(cluster_input(entity, stats, fingerprint), n_clusters)
+
+    @st.cache_data
+    def sweep(entity, stats, fingerprint):
+        return k_sweep(cluster_input(entity, stats, fingerprint))
+
+    @st.cache_data
+    def projection(entity, stats, fingerprint):
+        return pca_projection(cluster_input(entity, stats, fingerprint))
+
+    # Player-season rows are clustered incrementally: the shared model only
+    # absorbs rows it has not seen yet, and its results are cached per version.
+    season_keys = ["Player_Name_Stats", "Season_End_Year", "Tm_ID"]
 
-    per_game, team_misc = load_data()
+    @st.cache_resource
+    def season_clusterer(stats, n_clusters):
+        return IncrementalClusterer(stats, season_keys, n_clusters)
+
+    @st.cache_data
+    def season_clusters(_model, stats, n_clusters, version):
+        rows = _model.rows.set_index("Player_Name_Stats")
+        return rows.assign(Cluster=_model.labels()), _model.centers
+
+    # Projects the clustered rows themselves, so the scatter stays aligned
+    # with them even if another session has fed the shared model since.
+    @st.cache_data
+    def season_projection(_model, _rows, stats, n_clusters, version):
+        return _model.projection(_rows)
+
+    # One index per (entity, stats, data version); queries never rescan the table.
+    @st.cache_resource
+    def similarity_index(players, stats, fingerprint):
+        if players:
+            return SimilarityIndex(
+                per_game, stats, "Player_Name_Stats", "Season_End_Year", "Pos"
+            )
+        return SimilarityIndex(team_misc, stats, "Tm_ID", "Season_End_Year")
 
     st.header("Кластеризация")
     st.markdown(
         "Был использован алгоритм KMeans для кластеризации игроков и команд на основе выбранных метрик."
     )
 
-    entity = st.radio("Тип для кластеризации:", ["Игрок", "Команда"])
+    entity = st.radio(
+        "Тип для кластеризации:", ["Игрок", "Игрок по сезонам", "Команда"]
+    )
+    by_season = entity == "Игрок по сезонам"
     n_clusters = st.slider(
-        "Количество кластеров (K):", min_value=2, max_value=10, value=4
+        "Количество кластеров (K):",
+        min_value=K_RANGE.start,
+        max_value=K_RANGE.stop - 1,
+        value=4,
     )
 
-    if entity == "Игрок":
-        stats_opts = ["PTS", "TRB", "AST", "STL", "BLK"]
+    if entity != "Команда":
+        default_stats = ["PTS", "TRB", "AST", "STL", "BLK"]
+        stats_opts = default_stats + metrics_for("parsed_player_per_game_stats.csv")
         stats = st.multiselect(
-            "Выберите метрики для кластеризации:", stats_opts, default=stats_opts
+            "Выберите метрики для кластеризации:", stats_opts, default=default_stats
         )
-        df = per_game.groupby("Player_Name_Stats")[stats].mean().dropna()
         id_col = "Player_Name_Stats"
     else:
-        stats_opts = ["SRS", "ORtg", "DRtg", "Pace"]
+        default_stats = ["SRS", "ORtg", "DRtg", "Pace"]
+        stats_opts = default_stats + metrics_for("parsed_team_misc_stats.csv")
         stats = st.multiselect(
-            "Выберите метрики для кластеризации:", stats_opts, default=stats_opts
+            "Выберите метрики для кластеризации:", stats_opts, default=default_stats
         )
-        df = team_misc.groupby("Tm_ID")[stats].mean().dropna()
         id_col = "Tm_ID"
 
-    if df.empty:
+    with perf.section("fit") as section:
+        stats = tuple(stats)
+        if not stats:
+            df = pd.DataFrame()
+        elif by_season:
+            model = season_clusterer(stats, n_clusters)
+            model.update(per_game)
+            # An unfitted model has no centers or labels yet.
+            df, version = model.rows, model.version
+            if len(df) > n_clusters:
+                df, centers = season_clusters(model, stats, n_clusters, version)
+        else:
+            df = cluster_input(entity, stats, fingerprint)
+        section.rows = len(df)
+    if len(df) <= n_clusters:
         st.warning("Нет данных для кластеризации с выбранными метриками.")
         return
 
-    scaler = StandardScaler()
-    X = scaler.fit_transform(df)
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42).fit(X)
-    df["Cluster"] = kmeans.labels_
-
-    st.markdown(f"**Кластеризация {entity.lower()} на {n_clusters} групп.**")
+    if by_season:
+        st.markdown(
+            f"**Кластеризация {len(df)} сезонов игроков на {n_clusters} групп.** "
+            "MiniBatchKMeans дообучается на новых сезонах без полного пересчёта."
+        )
+    else:
+        sweep_key = ("k_sweep", entity, stats, fingerprint)
 
-    centers = pd.DataFrame(
-        scaler.inverse_transform(kmeans.cluster_centers_), columns=stats
-    )
-    centers["Cluster"] = centers.index
-    st.subheader("Центроиды кластеров")
-    st.dataframe(centers.style.background_gradient(cmap="Blues", subset=stats))
-
-    st.subheader("Профили кластеров")
-    cols = st.columns(n_clusters)
-    for i, col in enumerate(cols):
-        profile = centers[centers["Cluster"] == i][stats].T.reset_index()
-        profile.columns = ["Метрика", "Значение"]
-        chart = (
-            alt.Chart(profile)
-            .mark_bar()
-            .encode(
-                x=alt.X("Метрика:N", title=None),
-                y=alt.Y("Значение:Q", title="Значение центроида"),
+        def sweep_curves():
+            st.markdown(
+                f"Модели для K = {K_RANGE.start}…{K_RANGE.stop - 1} обучаются "
+                "параллельно один раз для текущего набора метрик; затем "
+                "переключение K берёт готовый результат."
+            )
+            if st.button("Рассчитать кривые"):
+                st.session_state[sweep_key] = True
+            if not st.session_state.get(sweep_key):
+                return
+            _, curves = sweep(entity, stats, fingerprint)
+            best_k = int(curves.loc[curves["Silhouette"].idxmax(), "K"])
+            base = alt.Chart(curves).encode(x=alt.X("K:O", title="K"))
+            curve_cols = st.columns(2)
+            curve_cols[0].altair_chart(
+                base.mark_line(point=True).encode(
+                    y=alt.Y("Inertia:Q", title="Инерция")
+                ),
+                use_container_width=True,
+            )
+            curve_cols[1].altair_chart(
+                base.mark_line(point=True).encode(
+                    y=alt.Y("Silhouette:Q", title="Силуэт")
+                ),
+                use_container_width=True,
             )
-            .properties(width=150, height=150, title=f"Кластер {i}")
+            st.markdown(f"Наибольший силуэт при **K = {best_k}**.")
+
+        lazy_section("Подбор K: инерция и силуэт", "k_sweep_open", sweep_curves)
+
+        with perf.section("fit"):
+            if st.session_state.get(sweep_key):
+                result = sweep(entity, stats, fingerprint)[0][n_clusters]
+            else:
+                result = clustering(entity, stats, n_clusters, fingerprint)
+        df = df.assign(Cluster=result.labels)
+        centers = result.centers
+        st.markdown(
+            f"**Кластеризация {entity.lower()} на {n_clusters} групп** "
+            f"(силуэт {result.silhouette:.3f})."
         )
-        col.altair_chart(chart, use_container_width=True)
-
-    st.subheader("Назначение кластеров")
-    cluster_choice = st.selectbox("Фильтр по кластеру:", sorted(df["Cluster"].unique()))
-    df_display = df[df["Cluster"] == cluster_choice].copy()
-    df_display.insert(0, id_col, df_display.index)
-    st.dataframe(df_display.reset_index(drop=True))
-
-    if entity == "Игрок":
-        st.subheader(f"Средние тренды по сезонам для кластера {cluster_choice}")
-        members = df[df["Cluster"] == cluster_choice].index.tolist()
-        ts_df = per_game[per_game["Player_Name_Stats"].isin(members)]
-        ts_summary = ts_df.groupby("Season_End_Year")[stats].mean().reset_index()
-        ts_long = ts_summary.melt(
-            "Season_End_Year", var_name="Метрика", value_name="Значение"
+    stats = list(stats)
+
+    with perf.section("charts"):
+        centers = centers.copy()
+        centers["Cluster"] = centers.index
+        st.subheader("Центроиды кластеров")
+        st.dataframe(centers.style.background_gradient(cmap="Blues", subset=stats))
+
+        st.subheader("Профили кластеров")
+        cols = st.columns(n_clusters)
+        for i, col in enumerate(cols):
+            profile = centers[centers["Cluster"] == i][stats].T.reset_index()
+            profile.columns = ["Метрика", "Значение"]
+            chart = (
+                alt.Chart(profile)
+                .mark_bar()
+                .encode(
+                    x=alt.X("Метрика:N", title=None),
+                    y=alt.Y("Значение:Q", title="Значение центроида"),
+                )
+                .properties(width=150, height=150, title=f"Кластер {i}")
+            )
+            col.altair_chart(chart, use_container_width=True)
+
+    # The cluster filter reruns only this fragment, without rebuilding the
+    # centroids and profiles above.
+    @fragment("Clustering: cluster members")
+    def cluster_members():
+        st.subheader("Назначение кластеров")
+        cluster_choice = st.selectbox(
+            "Фильтр по кластеру:", sorted(df["Cluster"].unique())
         )
-        ts_chart = (
-            alt.Chart(ts_long)
-            .mark_line(point=True)
+        df_display = df[df["Cluster"] == cluster_choice].copy()
+        df_display.insert(0, id_col, df_display.index)
+        st.dataframe(df_display.reset_index(drop=True))
+
+        if entity != "Команда":
+            st.subheader(f"Средние тренды по сезонам для кластера {cluster_choice}")
+            if by_season:
+                ts_df = df[df["Cluster"] == cluster_choice]
+            else:
+                members = df[df["Cluster"] == cluster_choice].index.tolist()
+                ts_df = per_game[per_game["Player_Name_Stats"].isin(members)]
+            ts_summary = ts_df.groupby("Season_End_Year")[stats].mean().reset_index()
+            ts_long = ts_summary.melt(
+                "Season_End_Year", var_name="Метрика", value_name="Значение"
+            )
+            ts_chart = (
+                alt.Chart(ts_long)
+                .mark_line(point=True)
+                .encode(
+                    x=alt.X("Season_End_Year:O", title="Сезон"),
+                    y=alt.Y("Значение:Q"),
+                    color=alt.Color("Метрика:N"),
+                )
+                .properties(width=700, height=300)
+            )
+            st.altair_chart(ts_chart, use_container_width=True)
+
+    cluster_members()
+
+    # The projection and the similarity index are built when their section is
+    # first opened; both sections rerun on their own.
+    def pca_scatter():
+        if len(stats) < 2:
+            st.info("Для проекции PCA выберите хотя бы две метрики.")
+            return
+        if by_season:
+            projected = season_projection(model, df, stats, n_clusters, version)
+        else:
+            projected = projection(entity, tuple(stats), fingerprint)
+        loadings = projected.loadings
+        pc1_dom = loadings.loc["PC1"].abs().idxmax()
+        pc2_dom = loadings.loc["PC2"].abs().idxmax()
+        df_vis = projected.coords.copy()
+        df_vis["Cluster"] = df["Cluster"].astype(str).to_numpy()
+        if len(df_vis) > scatter_points:
+            df_vis = df_vis.sample(scatter_points, random_state=42)
+
+        scatter = (
+            alt.Chart(df_vis.reset_index())
+            .mark_circle(size=60)
             .encode(
-                x=alt.X("Season_End_Year:O", title="Сезон"),
-                y=alt.Y("Значение:Q"),
-                color=alt.Color("Метрика:N"),
+                x=alt.X("PC1:Q", title=f"PC1 (доминирует: {pc1_dom})"),
+                y=alt.Y("PC2:Q", title=f"PC2 (доминирует: {pc2_dom})"),
+                color=alt.Color("Cluster:N", legend=alt.Legend(title="Кластер")),
+                tooltip=[id_col, "Cluster"],
             )
-            .properties(width=700, height=300)
+            .properties(width=700, height=400)
+        )
+        st.altair_chart(scatter, use_container_width=True)
+
+    def similar_search():
+        index = similarity_index(players, tuple(stats), fingerprint)
+        st.markdown(
+            "Ближайшие сезоны по стандартизированным значениям выбранных метрик "
+            "(евклидово расстояние)."
+        )
+        sim_cols = st.columns(3)
+        target = sim_cols[0].selectbox(
+            "Игрок:" if players else "Команда:",
+            sorted(index.rows[index.id_col].unique()),
+            key="similar_target",
         )
-        st.altair_chart(ts_chart, use_container_width=True)
-
-    st.subheader("PCA-проекция кластеров")
-    pca = PCA(n_components=2)
-    coords = pca.fit_transform(X)
-    loadings = pd.DataFrame(pca.components_, columns=stats, index=["PC1", "PC2"])
-    pc1_dom = loadings.loc["PC1"].abs().idxmax()
-    pc2_dom = loadings.loc["PC2"].abs().idxmax()
-    df_vis = pd.DataFrame(coords, columns=["PC1", "PC2"], index=df.index)
-    df_vis["Cluster"] = df["Cluster"].astype(str)
-
-    scatter = (
-        alt.Chart(df_vis.reset_index())
-        .mark_circle(size=60)
-        .encode(
-            x=alt.X("PC1:Q", title=f"PC1 (доминирует: {pc1_dom})"),
-            y=alt.Y("PC2:Q", title=f"PC2 (доминирует: {pc2_dom})"),
-            color=alt.Color("Cluster:N", legend=alt.Legend(title="Кластер")),
-            tooltip=[id_col, "Cluster"],
+        target_seasons = sorted(
+            index.rows.loc[
+                index.rows[index.id_col] == target, "Season_End_Year"
+            ].unique()
         )
-        .properties(width=700, height=400)
+        target_season = sim_cols[1].selectbox(
+            "Сезон:",
+            target_seasons,
+            index=len(target_seasons) - 1,
+            key="similar_season",
+        )
+        top_k = sim_cols[2].slider("Сколько показать:", 5, 50, 10, key="similar_k")
+        min_season = int(index.rows["Season_End_Year"].min())
+        max_season = int(index.rows["Season_End_Year"].max())
+        season_range = st.slider(
+            "Сезоны кандидатов:",
+            min_season,
+            max_season,
+            (min_season, max_season),
+            key="similar_seasons",
+        )
+        positions = None
+        if players:
+            positions = st.multiselect(
+                "Позиции кандидатов:",
+                sorted(index.rows["Pos"].dropna().unique()),
+                key="similar_positions",
+            )
+        rows = index.find(target, target_season)
+        similar = index.query(
+            rows[0],
+            k=top_k,
+            seasons=None if season_range == (min_season, max_season) else season_range,
+            positions=positions,
+        )
+        st.dataframe(similar, use_container_width=True)
+
+    players = entity != "Команда"
+    lazy_section("PCA-проекция кластеров", "cluster_pca_open", pca_scatter)
+    lazy_section(
+        "Похожие игроки" if players else "Похожие команды",
+        "similar_open",
+        similar_search,
     )
-    st.altair_chart(scatter, use_container_width=True)
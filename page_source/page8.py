@@ -2,28 +2,60 @@ def app():
     import pandas as pd
     import streamlit as st
     import altair as alt
-    from prophet import Prophet
+    from analytics import perf
+    from analytics.forecasts import (
+        ENGINES,
+        ENTITIES,
+        MAX_HORIZON,
+        MIN_SEASONS,
+        ForecastTable,
+        forecast_rows,
+        series_hash,
+    )
+    from analytics.panel import load_panel
+    from analytics.smoothing import forecast_frame
+
+    # Forecasts come from the batch job (python -m analytics.forecasts); a
+    # missing or outdated window is fitted on demand and written back.
+    @st.cache_resource
+    def get_forecast_table():
+        return ForecastTable()
 
+    # The smoothing engine forecasts every entity of a metric in one matrix
+    # pass, so a window that the batch job did not store is computed here.
     @st.cache_data
-    def load_data():
-        per_game = pd.read_csv("data/parsed_player_per_game_stats.csv")
-        team_misc = pd.read_csv("data/parsed_team_misc_stats.csv")
-        return per_game, team_misc
+    def league_forecast(entity_type, metric, start, end, fingerprint):
+        values = panels[entity_type].long(metric, start, end)
+        return forecast_frame(values, MAX_HORIZON).set_index("entity")
+
+    with perf.section("load_data"):
+        panels = {
+            entity_type: load_panel(table_name)
+            for entity_type, (table_name, _) in ENTITIES.items()
+        }
+    table = get_forecast_table()
+    table.refresh()
 
-    per_game, team_misc = load_data()
-    st.header("Прогнозирование с помощью Prophet")
+    st.header("Прогнозирование временных рядов")
     st.markdown(
-        "Используется библиотека [Prophet](https://facebook.github.io/prophet/) для прогнозирования метрик игроков и команд на основе временных рядов."
+        "Используется библиотека [Prophet](https://facebook.github.io/prophet/) или экспоненциальное сглаживание с затухающим трендом (NumPy) для прогнозирования метрик игроков и команд на основе временных рядов."
     )
 
     entity = st.radio("Выберите тип сущности:", ["Игрок", "Команда"], key="fc_entity")
-    years = sorted(per_game["Season_End_Year"].unique())
+    years = list(panels["player"].seasons)
     start_year, end_year = st.select_slider(
         "Выберите диапазон сезонов:",
         options=years,
         value=(years[0], years[-1]),
         key="fc_year_slider",
     )
+    engine = st.radio(
+        "Модель прогноза:",
+        list(ENGINES),
+        format_func=ENGINES.get,
+        horizontal=True,
+        key="fc_engine",
+    )
     periods = st.number_input(
         "Количество лет для прогноза:",
         min_value=1,
@@ -33,107 +65,78 @@ def app():
     )
 
     if entity == "Игрок":
-        players = sorted(per_game["Player_Name_Stats"].unique())
-        player = st.selectbox("Выберите игрока:", players, key="fc_player_select")
-        stat = st.selectbox(
+        entity_type = "player"
+        players = list(panels[entity_type].entities)
+        name = st.selectbox("Выберите игрока:", players, key="fc_player_select")
+        metric = st.selectbox(
             "Выберите метрику для прогноза:",
-            ["PTS", "TRB", "AST", "FG_Pct", "3P_Pct"],
+            ENTITIES[entity_type][1],
             key="fc_stat",
         )
-
-        df = per_game[
-            (per_game["Player_Name_Stats"] == player)
-            & (per_game["Season_End_Year"] >= start_year)
-            & (per_game["Season_End_Year"] <= end_year)
-        ][["Season_End_Year", stat]].copy()
-        df = df.rename(columns={"Season_End_Year": "ds", stat: "y"})
-
-        df["ds"] = pd.to_datetime(df["ds"].astype(str) + "-01-01")
-        df["Season"] = df["ds"].dt.year.astype(str)
-
-        st.subheader(f"{player} — {stat}: временной ряд и прогноз")
-
-        actual = (
-            alt.Chart(df)
-            .mark_line(color="blue", point=True)
-            .encode(
-                x=alt.X("Season:O", title="Сезон"),
-                y=alt.Y("y:Q", title=stat),
-                tooltip=["Season", "y"],
-            )
-            .properties(width=700, height=300)
-        )
-        st.altair_chart(actual, use_container_width=True)
-
-        if st.button("Построить прогноз", key="run_fc_player"):
-            model = Prophet(interval_width=0.9)
-            model.fit(df[["ds", "y"]])
-            future = model.make_future_dataframe(periods=periods, freq="Y")
-            forecast = model.predict(future)
-            forecast["Season"] = forecast["ds"].dt.year.astype(str)
-            hist_end = df["ds"].max()
-            fc_future = forecast[forecast["ds"] > hist_end]
-
-            band = (
-                alt.Chart(fc_future)
-                .mark_area(opacity=0.3)
-                .encode(x="Season:O", y="yhat_lower:Q", y2="yhat_upper:Q")
-            )
-            pred_line = (
-                alt.Chart(fc_future)
-                .mark_line(color="red", point=True)
-                .encode(x="Season:O", y="yhat:Q")
-            )
-            st.altair_chart(actual + band + pred_line, use_container_width=True)
-
     else:
-        teams = sorted(team_misc["Tm_ID"].unique())
-        team = st.selectbox("Выберите команду:", teams, key="fc_team_select")
+        entity_type = "team"
+        teams = list(panels[entity_type].entities)
+        name = st.selectbox("Выберите команду:", teams, key="fc_team_select")
         metric = st.selectbox(
             "Выберите метрику для прогноза:",
-            ["SRS", "ORtg", "Pace", "eFG_Pct", "TOV_Pct"],
+            ENTITIES[entity_type][1],
             key="fc_metric",
         )
 
-        df = team_misc[
-            (team_misc["Tm_ID"] == team)
-            & (team_misc["Season_End_Year"] >= start_year)
-            & (team_misc["Season_End_Year"] <= end_year)
-        ][["Season_End_Year", metric]].copy()
-        df = df.rename(columns={"Season_End_Year": "ds", metric: "y"})
-        df["ds"] = pd.to_datetime(df["ds"].astype(str) + "-01-01")
-        df["Season"] = df["ds"].dt.year.astype(str)
+    with perf.section("filter") as section:
+        panel = panels[entity_type]
+        series = panel.series(name, metric, start_year, end_year)
+        section.rows = len(series)
+    df = pd.DataFrame({"Season": series.index.astype(str), "y": series.to_numpy()})
 
-        st.subheader(f"{team} — {metric}: временной ряд и прогноз")
-        actual = (
-            alt.Chart(df)
-            .mark_line(color="blue", point=True)
-            .encode(
-                x=alt.X("Season:O", title="Сезон"),
-                y=alt.Y("y:Q", title=metric),
-                tooltip=["Season", "y"],
-            )
-            .properties(width=700, height=300)
+    st.subheader(f"{name} — {metric}: временной ряд и прогноз")
+    actual = (
+        alt.Chart(df)
+        .mark_line(color="blue", point=True)
+        .encode(
+            x=alt.X("Season:O", title="Сезон"),
+            y=alt.Y("y:Q", title=metric),
+            tooltip=["Season", "y"],
         )
-        st.altair_chart(actual, use_container_width=True)
+        .properties(width=700, height=300)
+    )
 
-        if st.button("Построить прогноз", key="run_fc_team"):
-            model = Prophet(interval_width=0.9)
-            model.fit(df[["ds", "y"]])
-            future = model.make_future_dataframe(periods=periods, freq="Y")
-            forecast = model.predict(future)
-            forecast["Season"] = forecast["ds"].dt.year.astype(str)
-            hist_end = df["ds"].max()
-            fc_future = forecast[forecast["ds"] > hist_end]
+    with perf.section("forecast"):
+        key = (entity_type, name, metric, engine, int(start_year), int(end_year))
+        forecast = table.lookup(*key, periods)
+        stale = forecast is not None and (
+            forecast["series_hash"].iloc[0] != series_hash(series)
+        )
+        if stale:
+            if engine == "prophet":
+                st.info(
+                    "Данные изменились после расчёта прогноза — его нужно обновить."
+                )
+            forecast = None
+        if forecast is None and engine == "ets" and len(series) >= MIN_SEASONS:
+            league = league_forecast(entity_type, metric, *key[4:], panel.fingerprint)
+            forecast = league.loc[[name]].head(periods).reset_index(drop=True)
+
+    if forecast is None:
+        st.altair_chart(actual, use_container_width=True)
+        if len(series) < MIN_SEASONS:
+            st.warning(f"Для прогноза нужно хотя бы {MIN_SEASONS} сезона данных.")
+            return
+        if not st.button("Построить прогноз", key=f"run_fc_{entity_type}"):
+            return
+        with st.spinner("Обучение Prophet..."):
+            table.upsert(forecast_rows(key + (MAX_HORIZON,), series))
+        forecast = table.lookup(*key, periods)
 
-            band = (
-                alt.Chart(fc_future)
-                .mark_area(opacity=0.3)
-                .encode(x="Season:O", y="yhat_lower:Q", y2="yhat_upper:Q")
-            )
-            pred_line = (
-                alt.Chart(fc_future)
-                .mark_line(color="red", point=True)
-                .encode(x="Season:O", y="yhat:Q")
-            )
-            st.altair_chart(actual + band + pred_line, use_container_width=True)
+    fc_future = forecast.assign(Season=forecast["Season"].astype(str))
+    band = (
+        alt.Chart(fc_future)
+        .mark_area(opacity=0.3)
+        .encode(x="Season:O", y="yhat_lower:Q", y2="yhat_upper:Q")
+    )
+    pred_line = (
+        alt.Chart(fc_future)
+        .mark_line(color="red", point=True)
+        .encode(x="Season:O", y="yhat:Q")
+    )
+    st.altair_chart(actual + band + pred_line, use_container_width=True)
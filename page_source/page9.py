@@ -1,14 +1,17 @@
 def app():
+    import importlib.util
+    import os
+
     import streamlit as st
-    import pandas as pd
     import numpy as np
-    from sklearn.ensemble import RandomForestRegressor
     from sklearn.metrics import mean_squared_error
-    from sklearn.preprocessing import MinMaxScaler
-    from tensorflow.keras.models import Sequential
-    from tensorflow.keras.layers import LSTM, Dense
-    from tensorflow.keras.callbacks import EarlyStopping
     import matplotlib.pyplot as plt
+    from analytics import perf
+    from analytics.backtest import BACKTEST_PATH, MODELS, load_results, summary
+    from analytics.data import TOTALS
+    from analytics.metrics import metrics_for
+    from analytics.panel import load_panel
+    from analytics.panel_models import PanelModels
 
     st.header("9. Прогнозирование временных рядов: LSTM против Random Forest")
     st.markdown(
@@ -18,6 +21,10 @@ def app():
     st.sidebar.header("Гиперпараметры")
     st.sidebar.markdown("Для сравнения моделей")
 
+    league = "Вся лига (одна модель на всех игроков)"
+    scope_mode = st.sidebar.radio(
+        "Режим обучения", [league, "Отдельная модель для игрока"]
+    )
     rf_trees = st.sidebar.number_input(
         "Random Forest: количество деревьев",
         min_value=10,
@@ -29,19 +36,63 @@ def app():
     lstm_units = st.sidebar.slider(
         "LSTM: количество нейронов", min_value=10, max_value=200, value=50
     )
+    # A league-wide epoch covers every player's windows, so it needs fewer.
     lstm_epochs = st.sidebar.slider(
-        "Количество эпох", min_value=10, max_value=500, value=200, step=10
+        "Количество эпох",
+        min_value=10,
+        max_value=500,
+        value=50 if scope_mode == league else 200,
+        step=10,
     )
-    batch_size = st.sidebar.slider("Размер батча", min_value=1, max_value=32, value=1)
+    if scope_mode == league:
+        batch_size = st.sidebar.select_slider(
+            "Размер батча", options=[32, 64, 128, 256, 512, 1024], value=256
+        )
+    else:
+        batch_size = st.sidebar.slider(
+            "Размер батча", min_value=1, max_value=32, value=1
+        )
     patience = st.sidebar.slider(
         "Ранняя остановка (patience)", min_value=1, max_value=20, value=5
     )
     optimizer = st.sidebar.selectbox("Оптимизатор", ["adam", "rmsprop", "sgd"])
+    has_tensorflow = importlib.util.find_spec("tensorflow") is not None
 
-    df_totals = pd.read_csv("data/parsed_player_totals_stats.csv")
-    players = sorted(df_totals["Player_Name_Stats"].unique())
+    # Models are trained once per (scope, stat, lags, hyperparameters, data)
+    # and shared across sessions; predictions are batched slices of them, run
+    # through the NumPy export instead of TensorFlow.
+    @st.cache_resource(max_entries=8, show_spinner=False)
+    def train_models(scope, stat, lags, params, fingerprint):
+        data = panel if scope is None else panel.subset([scope])
+        models = PanelModels(data, stat, lags).fit_rf(params["rf_trees"])
+        if has_tensorflow:
+            models.fit_lstm(
+                params["lstm_units"],
+                params["lstm_epochs"],
+                params["batch_size"],
+                params["patience"],
+                params["optimizer"],
+            )
+        predictor = models.export()
+        return models, predictor, models.test_mse(predictor)
+
+    # League-wide comparison from the stored rolling-origin backtest
+    # (python -m analytics.backtest), reloaded when the job rewrites it.
+    @st.cache_data(show_spinner=False)
+    def backtest_summary(mtime):
+        results = load_results()
+        if results is None:
+            return None
+        table = summary(results)
+        table["model"] = table["model"].map(MODELS).fillna(table["model"])
+        return table
+
+    with perf.section("load_data"):
+        panel = load_panel(TOTALS)
+    players = list(panel.entities)
     player = st.selectbox("Выберите игрока", players)
     stats = ["PTS", "TRB", "AST", "FG_Pct", "eFG_Pct"]
+    stats += metrics_for("parsed_player_totals_stats.csv")
     stat = st.selectbox("Выберите метрику для прогноза", stats)
     lags = st.slider(
         "Количество лагов (сезонов) в качестве признаков",
@@ -50,77 +101,110 @@ def app():
         value=3,
     )
 
-    series_df = df_totals[df_totals["Player_Name_Stats"] == player][
-        ["Season_End_Year", stat]
-    ]
-    series_df = series_df.sort_values("Season_End_Year").dropna()
-    values = series_df[stat].values
-
+    series = panel.series(player, stat)
     min_required = lags + 2
-    if len(values) < min_required:
+    if len(series) < min_required:
         st.warning(
-            f"Недостаточно данных для {player}: нужно минимум {min_required} сезонов, доступно {len(values)}."
+            f"Недостаточно данных для {player}: нужно минимум {min_required} сезонов, доступно {len(series)}."
         )
         return
-
-    scaler = MinMaxScaler()
-    scaled = scaler.fit_transform(values.reshape(-1, 1))
-
-    X, y = [], []
-    for i in range(lags, len(scaled)):
-        X.append(scaled[i - lags : i, 0])
-        y.append(scaled[i, 0])
-    X = np.array(X)
-    y = np.array(y)
-
-    split = len(X) - 2
-    X_train, X_test = X[:split], X[split:]
-    y_train, y_test = y[:split], y[split:]
-
-    if X_train.size == 0 or X_test.size == 0:
+    if scope_mode != league and len(series) < lags + 3:
         st.warning(
             "Недостаточно данных после разбиения. Попробуйте уменьшить число лагов или выбрать другого игрока."
         )
         return
 
-    rf = RandomForestRegressor(n_estimators=int(rf_trees), random_state=42)
-    rf.fit(X_train, y_train)
-    rf_pred = rf.predict(X_test)
-    rf_mse = mean_squared_error(y_test, rf_pred)
-
-    X_train_l = X_train.reshape((X_train.shape[0], X_train.shape[1], 1))
-    X_test_l = X_test.reshape((X_test.shape[0], X_test.shape[1], 1))
-    model = Sequential([LSTM(int(lstm_units), input_shape=(lags, 1)), Dense(1)])
-    model.compile(optimizer=optimizer, loss="mse")
-    early_stop = EarlyStopping(
-        monitor="loss", patience=int(patience), restore_best_weights=True
-    )
-    model.fit(
-        X_train_l,
-        y_train,
-        epochs=int(lstm_epochs),
-        batch_size=int(batch_size),
-        verbose=0,
-        callbacks=[early_stop],
-    )
-    lstm_pred = model.predict(X_test_l).flatten()
-    lstm_mse = mean_squared_error(y_test, lstm_pred)
+    params = {
+        "rf_trees": int(rf_trees),
+        "lstm_units": int(lstm_units),
+        "lstm_epochs": int(lstm_epochs),
+        "batch_size": int(batch_size),
+        "patience": int(patience),
+        "optimizer": optimizer,
+    }
+    scope = None if scope_mode == league else player
+    with st.spinner("Обучение моделей..."), perf.section("fit"):
+        models, predictor, league_mse = train_models(
+            scope, stat, lags, params, panel.fingerprint
+        )
+    if not has_tensorflow:
+        st.info("TensorFlow не установлен — показан только Random Forest.")
 
-    rf_inv = scaler.inverse_transform(rf_pred.reshape(-1, 1)).flatten()
-    lstm_inv = scaler.inverse_transform(lstm_pred.reshape(-1, 1)).flatten()
-    y_inv = scaler.inverse_transform(y_test.reshape(-1, 1)).flatten()
-    seasons = series_df["Season_End_Year"].values
-    test_seasons = seasons[-len(y_inv) :]
+    with perf.section("predict") as section:
+        windows = models.player_windows(player)
+        test = windows[windows["is_test"]]
+        predictions = predictor.predict(test)
+        y_true = test["target"].to_numpy()
+        test_seasons = test.index.get_level_values(1).to_numpy()
+        section.rows = len(test)
 
     st.subheader("Сравнение моделей (MSE)")
-    st.write(f"Random Forest MSE: **{rf_mse:.3f}**, LSTM MSE: **{lstm_mse:.3f}**")
+    st.write(
+        ", ".join(
+            f"{name} MSE: **{mean_squared_error(y_true, pred):.3f}**"
+            for name, pred in predictions.items()
+        )
+    )
+    if scope is None:
+        st.caption(
+            f"На тестовых сезонах всех игроков ({int(models.windows['is_test'].sum())} окон): "
+            + ", ".join(f"{name} MSE {mse:.3f}" for name, mse in league_mse.items())
+        )
 
     fig, ax = plt.subplots()
-    ax.plot(test_seasons, y_inv, marker="o", label="Факт")
-    ax.plot(test_seasons, rf_inv, marker="x", label="Random Forest")
-    ax.plot(test_seasons, lstm_inv, marker="s", label="LSTM")
+    ax.plot(test_seasons, y_true, marker="o", label="Факт")
+    markers = {"Random Forest": "x", "LSTM": "s"}
+    next_window = models.next_season(player)
+    next_pred = predictor.predict(next_window) if next_window is not None else {}
+    for name, pred in predictions.items():
+        (line,) = ax.plot(test_seasons, pred, marker=markers[name], label=name)
+        if name in next_pred:
+            ax.plot(
+                [test_seasons[-1], next_window.index[0]],
+                [pred[-1], next_pred[name][0]],
+                linestyle="--",
+                marker=markers[name],
+                color=line.get_color(),
+            )
     ax.set_xlabel("Сезон")
     ax.set_ylabel(stat)
     ax.set_title(f"{player} — {stat}: Фактическое vs Прогноз")
     ax.legend()
     st.pyplot(fig)
+    if next_pred:
+        st.write(
+            f"Прогноз на сезон {next_window.index[0]}: "
+            + ", ".join(
+                f"{name} — **{np.round(pred[0], 3)}**"
+                for name, pred in next_pred.items()
+            )
+        )
+
+    st.subheader("Сравнение по всей лиге (rolling-origin backtest)")
+    mtime = os.path.getmtime(BACKTEST_PATH) if os.path.exists(BACKTEST_PATH) else None
+    backtest = backtest_summary(mtime)
+    if backtest is None:
+        st.caption(
+            "Бэктест ещё не запускался: `python -m analytics.backtest --workers 4`."
+        )
+        return
+    columns = {
+        "model": "Модель",
+        "origins": "Сезонов",
+        "windows": "Окон",
+        "mse": "MSE",
+        "mae": "MAE",
+        "mse_vs_naive": "MSE / последний сезон",
+        "fit_s": "Обучение, с",
+        "latency_ms": "Прогноз 1 окна, мс",
+    }
+    current = backtest[(backtest["metric"] == stat) & (backtest["lags"] == lags)]
+    if current.empty:
+        st.caption(f"Для {stat} с {lags} лагами бэктеста нет.")
+    else:
+        st.dataframe(current[list(columns)].rename(columns=columns), hide_index=True)
+    with st.expander("Все метрики"):
+        pivot = backtest.pivot_table(
+            index=["metric", "lags"], columns="model", values="mse_vs_naive"
+        )
+        st.dataframe(pivot.round(3))
@@ -0,0 +1,33 @@
+import functools
+
+import streamlit as st
+
+from analytics import perf
+
+
+def fragment(name):
+    """st.fragment whose reruns are recorded by analytics.perf under name."""
+
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with perf.rerun(name, kind="fragment"):
+                return func(*args, **kwargs)
+
+        return st.fragment(run)
+
+    return decorate
+
+
+@st.fragment
+def lazy_section(label, key, render, *args, **kwargs):
+    """Expander whose content is built only while it is open.
+
+    The section is a fragment: opening or closing it, or using widgets inside
+    render, reruns this section only, not the whole page.
+    """
+    section = st.expander(label, key=key, on_change="rerun")
+    with section:
+        if section.open:
+            with perf.rerun(label, kind="fragment"):
+                render(*args, **kwargs)